@@ -12,9 +12,11 @@
 # ***************************************************************************
 
 import argparse
+import importlib.util
 import os
 import sys
 import unittest
+from unittest import mock
 
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__))+os.sep+'..')
 from tkltest.util import config_util, config_options, constants
@@ -58,3 +60,30 @@ class ConfigTest(unittest.TestCase):
         config_options.print_options_with_help()
         config_options.print_options_with_help(tablefmt='github')
         config_options.print_options_with_help(command='generate')
+
+    def test_constants_import_no_filesystem_access(self) -> None:
+        """Test that importing constants does not access the file system"""
+        spec = importlib.util.spec_from_file_location(constants.__name__, constants.__file__)
+        fresh_constants = importlib.util.module_from_spec(spec)
+        # the module code is read before patching, so that only the file system accesses of the module are seen
+        code = spec.loader.get_code(spec.name)
+        cwd = os.getcwd()
+        home = os.path.expanduser('~')
+        with mock.patch('os.getcwd', return_value=cwd) as getcwd, \
+                mock.patch('os.path.expanduser', return_value=home) as expanduser, \
+                mock.patch('builtins.open') as open_file, \
+                mock.patch('os.stat') as stat, \
+                mock.patch('os.scandir') as scandir, \
+                mock.patch('os.listdir') as listdir:
+            exec(code, fresh_constants.__dict__)
+            for fs_access in [getcwd, expanduser, open_file, stat, scandir, listdir]:
+                fs_access.assert_not_called()
+
+            # the cli directory is read on first access only, and lib paths are derived from it
+            self.assertEqual(cwd, fresh_constants.TKLTEST_CLI_DIR)
+            self.assertEqual(os.path.join(cwd, 'lib', 'download'), fresh_constants.TKLTEST_LIB_DOWNLOAD_DIR)
+            self.assertEqual(1, getcwd.call_count)
+
+            # the user home directory is read on first access of the cache directory only
+            self.assertEqual(os.path.join(home, '.tkltest', 'exec_cache'), fresh_constants.TKLTEST_EXEC_CACHE_DIR)
+            self.assertEqual(1, expanduser.call_count)
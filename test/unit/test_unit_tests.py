@@ -18,9 +18,12 @@ import unittest
 import toml
 import shutil
 import copy
+import tempfile
+import zipfile
+from unittest import mock
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__))+os.sep+'..')
 from tkltest.util import config_util, constants, command_util
-from tkltest.util.unit import dir_util, build_util
+from tkltest.util.unit import dir_util, build_util, exec_cache, jacoco_merge
 from tkltest.generate.unit import generate, augment
 
 
@@ -567,6 +570,333 @@ class UnitTests(unittest.TestCase):
         dir_util.cd_cli_dir()
         self.__assert_no_artifact_at_cli([app_name])
 
+    def test_build_files_key(self) -> None:
+        """Test that build files are regenerated only if an input of their generation changes"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            test_root_dir = os.path.join(tmp_dir, 'irs-ctd-amplified-tests')
+            output_dir = os.path.join(tmp_dir, 'tkltest-output-unit-irs')
+            os.makedirs(os.path.join(test_root_dir, 'monolithic'))
+            os.makedirs(output_dir)
+            build_args = dict(
+                app_name='irs',
+                monolith_app_path=[os.path.join(tmp_dir, 'classes')],
+                app_classpath=os.path.join(tmp_dir, 'dep.jar'),
+                test_root_dir=test_root_dir,
+                test_dirs=[os.path.join(test_root_dir, 'monolithic')],
+                partitions_file=None,
+                target_class_list=[],
+                main_reports_dir=os.path.join(tmp_dir, 'irs-tkltest-reports'),
+                app_packages=['irs.*'],
+                collect_codecoverage=True,
+                offline_instrumentation=True,
+                output_dir=output_dir
+            )
+            build_files = build_util.generate_build_xml(**build_args)
+
+            # the key is kept in the output directory, not in the test directory
+            self.assertSetEqual({'monolithic', 'build.xml', 'pom.xml', 'build.gradle'}, set(os.listdir(test_root_dir)))
+            self.assertEqual(1, len(os.listdir(os.path.join(output_dir, constants.TKL_BUILD_FILES_KEYS_DIR))))
+
+            # build files are not regenerated for the same inputs
+            for build_file in build_files:
+                os.utime(build_file, ns=(0, 0))
+            build_util.generate_build_xml(**build_args)
+            self.assertListEqual([0, 0, 0], [os.stat(build_file).st_mtime_ns for build_file in build_files])
+
+            # build files are regenerated if an input changes
+            build_args['app_packages'] = ['irs.Employer']
+            build_util.generate_build_xml(**build_args)
+            for build_file in build_files:
+                self.assertNotEqual(0, os.stat(build_file).st_mtime_ns)
+            with open(build_files[0]) as f:
+                self.assertIn('includes="irs.Employer"', f.read())
+
+    def test_jacoco_exec_file_merge(self) -> None:
+        """Test reading, merging, and writing of jacoco raw coverage data files"""
+        ctd_data = {
+            0x1a2b3c4d5e6f7081: ('irs/IRS', 10, 0b1000000101),
+            0x0102030405060708: ('irs/Employer', 3, 0b001),
+        }
+        test_data = {
+            0x0102030405060708: ('irs/Employer', 3, 0b110),
+            0x7f00000000000001: ('irs/Salary', 200, 1 << 199),
+        }
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            ctd_exec_file = os.path.join(tmp_dir, 'ctd.exec')
+            jacoco_merge.write_exec_file(ctd_exec_file, ctd_data)
+            self.assertDictEqual(ctd_data, jacoco_merge.load_exec_file(ctd_exec_file))
+
+            merged_data = jacoco_merge.merge_exec_data(jacoco_merge.load_exec_file(ctd_exec_file), test_data)
+            self.assertEqual(7, jacoco_merge.get_covered_probe_count(merged_data))
+
+            merged_exec_file = os.path.join(tmp_dir, 'merged.exec')
+            jacoco_merge.write_exec_file(merged_exec_file, merged_data)
+            self.assertDictEqual(merged_data, jacoco_merge.load_exec_file(merged_exec_file))
+
+            # probe vectors over a common probe index
+            probe_index = jacoco_merge.create_probe_index([ctd_data, test_data])
+            ctd_vector = jacoco_merge.to_probe_vector(ctd_data, probe_index)
+            test_vector = jacoco_merge.to_probe_vector(test_data, probe_index)
+            self.assertEqual(3, jacoco_merge.popcount(test_vector & ~ctd_vector))
+            uncovered_vector = jacoco_merge.complement_probe_vector(ctd_vector, probe_index)
+            self.assertEqual(3, jacoco_merge.popcount(test_vector & uncovered_vector))
+            self.assertEqual(ctd_vector, jacoco_merge.complement_probe_vector(uncovered_vector, probe_index))
+            all_probes_vector = jacoco_merge.complement_probe_vector(0, probe_index)
+            self.assertEqual(213, jacoco_merge.popcount(all_probes_vector))
+            self.assertEqual(0, jacoco_merge.complement_probe_vector(all_probes_vector, probe_index))
+            self.assertDictEqual({class_id: data for class_id, data in merged_data.items() if data[2]},
+                                 jacoco_merge.from_probe_vector(ctd_vector | test_vector, probe_index))
+
+            # truncated data files are rejected
+            with open(merged_exec_file, 'rb') as f:
+                merged_bytes = f.read()
+            with open(merged_exec_file, 'wb') as f:
+                f.write(merged_bytes[:-3])
+            self.assertRaises(ValueError, jacoco_merge.load_exec_file, merged_exec_file)
+
+            # incremental merging skips corrupt data files
+            test_exec_file = os.path.join(tmp_dir, 'test.exec')
+            jacoco_merge.write_exec_file(test_exec_file, test_data)
+            merged_data, skipped = jacoco_merge.merge_exec_files([ctd_exec_file, merged_exec_file, test_exec_file])
+            self.assertEqual([merged_exec_file], [exec_file for exec_file, _ in skipped])
+            self.assertEqual(7, jacoco_merge.get_covered_probe_count(merged_data))
+
+    def test_jacoco_exec_data_app_class_filter(self) -> None:
+        """Test that execution data of test classes is dropped from the coverage of app classes"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            class_dir = os.path.join(tmp_dir, 'classes')
+            os.makedirs(os.path.join(class_dir, 'irs'))
+            for class_file in ['IRS.class', 'Employer.class', 'Employer$Salary.class', 'package-info.java']:
+                Path(class_dir, 'irs', class_file).touch()
+            class_jar = os.path.join(tmp_dir, 'lib.jar')
+            with zipfile.ZipFile(class_jar, 'w') as jar:
+                jar.writestr('util/Util.class', b'')
+                jar.writestr('META-INF/MANIFEST.MF', b'')
+            app_class_names = jacoco_merge.get_class_names([class_dir, class_jar])
+            self.assertSetEqual({'irs/IRS', 'irs/Employer', 'irs/Employer$Salary', 'util/Util'}, set(app_class_names))
+
+        test_data = {
+            0x0102030405060708: ('irs/Employer', 3, 0b110),
+            0x0203040506070809: ('irs/IRS_ESTest', 20, 0b111),
+            0x030405060708090a: ('irs/IRS_ESTest_scaffolding', 4, 0b1),
+        }
+        app_data = jacoco_merge.filter_exec_data(test_data, app_class_names)
+        self.assertDictEqual({0x0102030405060708: ('irs/Employer', 3, 0b110)}, app_data)
+        self.assertEqual(2, jacoco_merge.get_covered_probe_count(app_data))
+
+    def test_scan_evosuite_test_class(self) -> None:
+        """Test detection of EvoSuite test classes without generated tests and counting of test methods"""
+        scan_test_class = getattr(augment, '__scan_test_class')
+        test_class_header = (
+            '/*\n'
+            ' * This file was automatically generated by EvoSuite\n'
+            ' */\n'
+            '\n'
+            'package irs;\n'
+            '\n'
+            'import org.junit.Test;\n'
+            'import static org.junit.Assert.*;\n'
+            'import org.evosuite.runtime.EvoRunner;\n'
+            'import org.evosuite.runtime.EvoRunnerParameters;\n'
+            'import org.junit.runner.RunWith;\n'
+            '\n'
+            '@RunWith(EvoRunner.class) @EvoRunnerParameters(mockJVMNonDeterminism = true, useVFS = true, '
+            'useVNET = true, resetStaticState = true, separateClassLoader = true) \n'
+            'public class Employer_ESTest extends Employer_ESTest_scaffolding {\n'
+            '\n'
+        )
+        empty_test_class = test_class_header + (
+            '  @Test\n'
+            '  public void notGeneratedAnyTest() {\n'
+            '      // EvoSuite did not generate any tests\n'
+            '  }\n'
+            '}\n'
+        )
+        test_class = test_class_header + (
+            '  @Test(timeout = 4000)\n'
+            '  public void test0()  throws Throwable  {\n'
+            '      Employer employer0 = new Employer();\n'
+            '      assertEquals(0, employer0.getEmployerId());\n'
+            '  }\n'
+            '\n'
+            '  @Test(timeout = 4000)\n'
+            '  public void test1()  throws Throwable  {\n'
+            '      Employer employer0 = new Employer();\n'
+            '      employer0.setEmployerId(1);\n'
+            '      assertEquals(1, employer0.getEmployerId());\n'
+            '  }\n'
+            '}\n'
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            test_file = os.path.join(tmp_dir, 'Employer_ESTest.java')
+            with open(test_file, 'w') as f:
+                f.write(empty_test_class)
+            self.assertEqual((True, 1), scan_test_class(test_file))
+
+            # the cached result is not reused for a file rewritten with a different size, even if its mtime is
+            # unchanged
+            mtime_ns = os.stat(test_file).st_mtime_ns
+            with open(test_file, 'w') as f:
+                f.write(test_class)
+            os.utime(test_file, ns=(mtime_ns, mtime_ns))
+            self.assertEqual((False, 2), scan_test_class(test_file))
+
+            # a file rewritten with the same size is rescanned if its mtime changed, but not if its mtime is unchanged
+            marker = '// EvoSuite did not generate any tests'
+            same_size_test_class = empty_test_class.replace(marker, '// ' + 'x' * (len(marker) - 3))
+            self.assertEqual(len(empty_test_class), len(same_size_test_class))
+            with open(test_file, 'w') as f:
+                f.write(empty_test_class)
+            os.utime(test_file, ns=(mtime_ns, mtime_ns))
+            self.assertEqual((True, 1), scan_test_class(test_file))
+            with open(test_file, 'w') as f:
+                f.write(same_size_test_class)
+            os.utime(test_file, ns=(mtime_ns, mtime_ns))
+            self.assertEqual((True, 1), scan_test_class(test_file))
+            os.utime(test_file, ns=(mtime_ns + 1000, mtime_ns + 1000))
+            self.assertEqual((False, 1), scan_test_class(test_file))
+
+    def test_exec_cache(self) -> None:
+        """Test keys, lookup, store, and eviction of the raw coverage data cache"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            test_file = os.path.join(tmp_dir, 'Employer_ESTest.java')
+            build_file = os.path.join(tmp_dir, 'build.xml')
+            jdk_dir = os.path.join(tmp_dir, 'jdk')
+            dep_jar = os.path.join(tmp_dir, 'dep.jar')
+            os.mkdir(jdk_dir)
+            for file_path, content in [(test_file, 'class Employer_ESTest {}'), (build_file, '<project/>'),
+                                       (os.path.join(jdk_dir, 'release'), 'JAVA_VERSION="1.8.0_292"'),
+                                       (dep_jar, 'jar')]:
+                with open(file_path, 'w') as f:
+                    f.write(content)
+
+            # the signature covers the dependency jars, the jdk, and the jvm options
+            signature = exec_cache.get_signature([dep_jar], jdk_dir, constants.SHORT_LIVED_BUILD_JVM_OPTS)
+            self.assertEqual(signature,
+                             exec_cache.get_signature([dep_jar], jdk_dir, constants.SHORT_LIVED_BUILD_JVM_OPTS))
+            self.assertNotEqual(signature, exec_cache.get_signature([dep_jar], jdk_dir, '-Xmx1g'))
+            with open(os.path.join(jdk_dir, 'release'), 'w') as f:
+                f.write('JAVA_VERSION="11.0.11"')
+            self.assertNotEqual(signature,
+                                exec_cache.get_signature([dep_jar], jdk_dir, constants.SHORT_LIVED_BUILD_JVM_OPTS))
+            with open(dep_jar, 'w') as f:
+                f.write('updated jar')
+            dep_signature = exec_cache.get_signature([dep_jar], jdk_dir, constants.SHORT_LIVED_BUILD_JVM_OPTS)
+            self.assertNotEqual(signature, dep_signature)
+            with mock.patch.object(constants, 'JACOCO_MAVEN_VERSION', '0.8.8'):
+                self.assertNotEqual(dep_signature,
+                                    exec_cache.get_signature([dep_jar], jdk_dir, constants.SHORT_LIVED_BUILD_JVM_OPTS))
+
+            # the key covers the test sources, the build file, and the signature
+            key = exec_cache.get_key([test_file], build_file, signature)
+            self.assertNotEqual(key, exec_cache.get_key([test_file], build_file, dep_signature))
+            with open(build_file, 'w') as f:
+                f.write('<project name="updated"/>')
+            self.assertNotEqual(key, exec_cache.get_key([test_file], build_file, signature))
+
+            # lookup of stored entries; the default cache directory is resolved when the cache is accessed
+            cache_dir = os.path.join(tmp_dir, 'cache')
+            exec_file = os.path.join(tmp_dir, 'Employer_ESTest.exec')
+            jacoco_merge.write_exec_file(exec_file, {0x0102030405060708: ('irs/Employer', 3, 0b110)})
+            with mock.patch.object(constants, 'TKLTEST_EXEC_CACHE_DIR', cache_dir):
+                cached_exec_file = os.path.join(tmp_dir, 'cached.exec')
+                self.assertIsNone(exec_cache.lookup(key, cached_exec_file))
+                exec_cache.store(key, exec_file, {'app_probe_covered': 2})
+                self.assertDictEqual({'app_probe_covered': 2}, exec_cache.lookup(key, cached_exec_file))
+                self.assertDictEqual(jacoco_merge.load_exec_file(exec_file),
+                                     jacoco_merge.load_exec_file(cached_exec_file))
+
+            # least recently used entries are evicted first, with both files of an entry counted and removed
+            other_cache_dir = os.path.join(tmp_dir, 'other_cache')
+            for i, entry_key in enumerate(['a', 'b', 'c', 'd']):
+                exec_cache.store(entry_key, exec_file, {'app_probe_covered': i}, cache_dir=other_cache_dir)
+                os.utime(os.path.join(other_cache_dir, entry_key + exec_cache.EXEC_SUFFIX), (i, i))
+            entry_size = sum(os.path.getsize(os.path.join(other_cache_dir, 'a' + suffix))
+                             for suffix in (exec_cache.EXEC_SUFFIX, exec_cache.COVERAGE_SUFFIX))
+            self.assertIsNotNone(exec_cache.lookup('a', cached_exec_file, cache_dir=other_cache_dir))
+            exec_cache.evict(max_size=3 * entry_size, cache_dir=other_cache_dir)
+            self.assertSetEqual({'a', 'c', 'd'}, {os.path.splitext(name)[0] for name in os.listdir(other_cache_dir)})
+            exec_cache.evict(max_size=2 * entry_size - 1, cache_dir=other_cache_dir)
+            self.assertSetEqual({'a' + exec_cache.EXEC_SUFFIX, 'a' + exec_cache.COVERAGE_SUFFIX},
+                                set(os.listdir(other_cache_dir)))
+            self.assertTrue(os.path.isfile(os.path.join(cache_dir, key + exec_cache.EXEC_SUFFIX)))
+
+    def test_augmentation_lazy_greedy_selection(self) -> None:
+        """Test selection of augmenting test classes by coverage gain over the selected test classes"""
+        uncovered_vector = 0b1_1111_1111
+        test_vectors = {
+            'A': (0b0000_1111, 1),
+            'B': (0b0001_1110, 1),
+            'C': (0b1110_0000, 1),
+            'D': (0b0000_0001, 1),
+        }
+        # after A, the gain of B drops to 1, so C is selected before B; D covers no probes not covered by A
+        self.assertEqual((['A', 'C', 'B'], 0b1_0000_0000),
+                         self.__select_tests(test_vectors, uncovered_vector, optimal=True))
+
+        # gain is per test method
+        test_vectors = {
+            'A': (0b1111_1100, 3),
+            'B': (0b0000_0111, 1),
+        }
+        self.assertEqual((['B', 'A'], 0b1_0000_0000),
+                         self.__select_tests(test_vectors, uncovered_vector, optimal=True))
+
+        # ties are broken by pool order, and selection stops once all probes are covered
+        test_vectors = {
+            'A': (0b0000_1111, 2),
+            'B': (0b1_1111_0000, 2),
+            'C': (0b1_1111_0000, 2),
+            'D': (0b0000_1111, 2),
+        }
+        self.assertEqual((['B', 'A'], 0), self.__select_tests(test_vectors, uncovered_vector, optimal=True))
+        self.assertEqual(([], uncovered_vector), self.__select_tests({}, uncovered_vector, optimal=True))
+
+    def test_augmentation_sweep_selection(self) -> None:
+        """Test selection of augmenting test classes in a single sweep ordered by coverage gain over the base tests"""
+        uncovered_vector = 0b1_1111_1111
+        test_vectors = {
+            'A': (0b0000_1111, 1),
+            'B': (0b0001_1110, 1),
+            'C': (0b1110_0000, 1),
+            'D': (0b0000_0001, 1),
+        }
+        # unlike lazy greedy selection, B is selected before C by its gain over the base tests; D is skipped
+        self.assertEqual((['A', 'B', 'C'], 0b1_0000_0000),
+                         self.__select_tests(test_vectors, uncovered_vector, optimal=False))
+
+        # gain is per test method
+        test_vectors = {
+            'A': (0b1111_1100, 3),
+            'B': (0b0000_0111, 1),
+        }
+        self.assertEqual((['B', 'A'], 0b1_0000_0000),
+                         self.__select_tests(test_vectors, uncovered_vector, optimal=False))
+
+        # ties are broken by pool order, and the sweep stops once all probes are covered
+        test_vectors = {
+            'A': (0b0000_1111, 2),
+            'B': (0b1_1111_0000, 2),
+            'C': (0b1_1111_0000, 2),
+            'D': (0b0000_1111, 2),
+            'E': (0b1_0000_0000, 1),
+        }
+        self.assertEqual((['B', 'A'], 0), self.__select_tests(test_vectors, uncovered_vector, optimal=False))
+        self.assertEqual(([], uncovered_vector), self.__select_tests({}, uncovered_vector, optimal=False))
+
+    def __select_tests(self, test_vectors, uncovered_vector, optimal):
+        """Selects augmenting test classes from the given (probe vector, test method count) of each test class"""
+        tests_with_coverage_gain = {
+            test_class: {
+                'probe_cov_delta': jacoco_merge.popcount(test_vector & uncovered_vector),
+                'test_method_count': test_method_count
+            }
+            for test_class, (test_vector, test_method_count) in test_vectors.items()
+        }
+        test_probe_vectors = {test_class: test_vector for test_class, (test_vector, _) in test_vectors.items()}
+        return getattr(augment, '__select_tests')(tests_with_coverage_gain, test_probe_vectors, uncovered_vector,
+                                                  optimal=optimal)
+
     def __assert_classpath(self, standard_classpath, generated_classpath, build_type, message):
         """
         :param standard_classpath: Path to the standard classpath for comparison.
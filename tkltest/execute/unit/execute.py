@@ -68,16 +68,7 @@ def run_dev_tests(config):
 
 
 def __get_test_classes(test_root_dir):
-    # need to recursively traverse files because they are located in sub folders; create map from dir path
-    # to .java test files in that dir
-    test_files = {
-        dp : [f for f in filenames if os.path.splitext(f)[1] == '.java']
-        for dp, dn, filenames in os.walk(test_root_dir)
-    }
-    # remove entries with empty file list
-    test_files = {
-        dir : test_files[dir] for dir in test_files.keys() if test_files[dir]
-    }
+    test_files = coverage_util.get_test_classes(test_root_dir)
     tkltest_status('Total test classes: {}'.format(sum([len(test_files[d]) for d in test_files.keys()])))
     return test_files
 
@@ -322,8 +313,8 @@ def __compare_to_dev_tests_coverage(config, jacoco_raw_date_file = ''):
         jacoco_raw_date_file = coverage_util.get_jacoco_exec_file(config['general']['build_type'], test_root_dir)
     # merging the .exec files
     try:
-        command_util.run_command("java -Xmx2048m -jar {} merge {} {} --destfile {}".
-                             format(jacoco_cli_file, jacoco_raw_date_file, dev_coverage_exec,
+        command_util.run_command("java -Xmx2048m {} -jar {} merge {} {} --destfile {}".
+                             format(constants.JACOCO_CLI_JVM_OPTS, jacoco_cli_file, jacoco_raw_date_file, dev_coverage_exec,
                                     merged_exec_file), verbose=True)
     except subprocess.CalledProcessError as e:
         tkltest_status('Warning: Failed to merge coverage data files {} and {}, not creating a compare report:\n {}\n{}'.format(jacoco_raw_date_file, dev_coverage_exec, e, e.stderr))
@@ -396,8 +387,8 @@ def merge_modules_coverage_reports(tkltest_config, modules_configs, failed_modul
     merged_exec_file = coverage_util.get_jacoco_exec_file(tkltest_config['general']['build_type'], test_root_dir)
     jacoco_cli_file = os.path.join(constants.TKLTEST_LIB_DOWNLOAD_DIR, constants.JACOCO_CLI_JAR_NAME)
     try:
-        command_util.run_command('java -Xmx'+str(tkltest_config['general']['max_memory_for_coverage']) + 'm  -jar {} merge {} --destfile {}'.
-                         format(jacoco_cli_file, ' '.join(jacoco_exec_files), merged_exec_file), verbose=True)
+        command_util.run_command('java -Xmx'+str(tkltest_config['general']['max_memory_for_coverage']) + 'm {} -jar {} merge {} --destfile {}'.
+                         format(constants.JACOCO_CLI_JVM_OPTS, jacoco_cli_file, ' '.join(jacoco_exec_files), merged_exec_file), verbose=True)
     except subprocess.CalledProcessError as e:
         tkltest_status('Warning: failed to create a merged coverage report. Jacoco_cli failed to merge exec files: {}\n{}'.format(e, e.stderr))
         return
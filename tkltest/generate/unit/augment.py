@@ -11,6 +11,9 @@
 # limitations under the License.
 # ***************************************************************************
 
+import concurrent.futures
+import functools
+import heapq
 import logging
 import os
 import re
@@ -19,9 +22,12 @@ import subprocess
 import sys
 
 from tkltest.util import constants
-from tkltest.util.unit import coverage_util
+from tkltest.util.unit import build_util, coverage_util, exec_cache, jacoco_merge
 from tkltest.util.logging_util import tkltest_status
 
+# pattern for the annotation of a test method
+__TEST_METHOD_ANNOTATION = re.compile(r'[\t ]*@Test(?:\(timeout ?= ?[0-9]+\))?[\t ]*')
+
 
 def augment_with_code_coverage(config, build_file, build_type, ctd_test_dir, report_dir):
     """Augments CTD-guided tests with coverage-increasing base tests.
@@ -30,16 +36,22 @@ def augment_with_code_coverage(config, build_file, build_type, ctd_test_dir, rep
     suite by adding each test class generated by the base test generator that increases code
     coverage achieved by the test suite. The augmentation is done in two passes. In the first pass,
     the coverage increment of each test class over the coverage of the initial test suite is
-    computed. Test classes that do not increase coverage are discarded; the remaining test classes
-    are sorted based on decreasing order of coverage increments. In the second pass, the initial
-    test suite is augmented by adding one test class at a time: this is done by processing each
-    test class in the sorted order and adding the test class to the test suite if it increases
-    the coverage of the augmented test suite.
+    computed. Test classes that do not increase coverage are discarded. In the second pass, the remaining
+    test classes are sorted in decreasing order of coverage increment per test method, and the initial test
+    suite is augmented in a single sweep over the sorted test classes, adding each test class that increases
+    the coverage of the augmented test suite. With the optimal_augmentation option, the initial test suite is
+    instead augmented by adding, at each step, the test class with the highest coverage increment per test
+    method over the augmented test suite, until no remaining test class increases its coverage. Because coverage
+    increments can only decrease as the augmented test suite grows, increments are kept in a priority
+    queue and only the increment of the test class at the top of the queue is recomputed at each step
+    (lazy greedy selection).
 
     Rather than executing the tests at each step to obtain updated coverage, the raw coverage output file (jacoco.exec)
     of each test from the augmentation pool is kept, and at each step is merged with the current test suite raw
-    coverage file to obtain the new raw coverage file. This way we execute each test only once instead of up to n times,
-    where n is the number of tests in the augmentation pool.
+    coverage data to obtain the new raw coverage data. This way we execute each test only once instead of up to n times,
+    where n is the number of tests in the augmentation pool. The raw coverage data files are loaded and merged
+    in-process, and coverage gains are measured in Jacoco probes (each newly covered probe implies newly covered
+    instructions or branches), so that Jacoco reports are created only once, for the final augmented test suite.
 
     Args:
         config (dict): loaded and validated config information
@@ -59,6 +71,22 @@ def augment_with_code_coverage(config, build_file, build_type, ctd_test_dir, rep
         dev_tests = None
     tkltest_status('Performing coverage-driven test-suite augmentation and optimization')
 
+    # coverage is measured over the app classes only: the raw coverage data files also hold execution data of
+    # the test classes themselves (e.g., the EvoSuite test and scaffolding classes), which every test covers
+    app_class_names = jacoco_merge.get_class_names(config['general']['monolith_app_path'])
+
+    # raw coverage data of test classes that are unchanged since an earlier augmentation run (in the same
+    # environment) is optionally taken from a cache instead of executing the test classes again
+    coverage_cache = None
+    if config['generate']['ctd_amplified']['augmentation_coverage_cache']:
+        coverage_cache = {
+            'dir': config['generate']['ctd_amplified']['augmentation_coverage_cache_dir'] or None,
+            'signature': exec_cache.get_signature(
+                class_paths=config['general']['monolith_app_path'] + __get_classpath_jars(config),
+                jdk_path=config['general']['java_jdk_home'],
+                build_jvm_opts=constants.SHORT_LIVED_BUILD_JVM_OPTS)
+        }
+
     # compute initial coverage of CTD test suite and of each evosuite test file
 
     test_class_augment_pool, base_test_coverage, raw_cov_data_dir, has_coverage = \
@@ -69,8 +97,10 @@ def augment_with_code_coverage(config, build_file, build_type, ctd_test_dir, rep
             build_type=build_type,
             report_dir=report_dir,
             class_files=config['general']['monolith_app_path'],
+            app_class_names=app_class_names,
             jdk_path=config['general']['java_jdk_home'],
-            dev_tests=dev_tests
+            dev_tests=dev_tests,
+            coverage_cache=coverage_cache
     )
 
     if not has_coverage:
@@ -80,34 +110,41 @@ def augment_with_code_coverage(config, build_file, build_type, ctd_test_dir, rep
     tkltest_status('Collecting coverage gain for each of {} tests in the augmentation test pool'.format(
         len(test_class_augment_pool)))
 
-    # initialize map for test classes that provide coverage gain
-    tests_with_coverage_gain, total_inst_cov_gain, total_branch_cov_gain = __compute_tests_with_coverage_gain(
+    # load raw coverage data of CTD test suite and of each test in the augmentation pool as probe vectors
+    probe_index, ctd_probe_vector, test_probe_vectors = __load_probe_vectors(
         test_class_augment_pool=test_class_augment_pool,
-        ctd_test_dir=ctd_test_dir,
-        base_ctd_coverage=base_test_coverage,
-        class_files=config['general']['monolith_app_path'],
         raw_cov_dir=raw_cov_data_dir,
-        report_dir=report_dir,
-        max_memory=config['general']['max_memory_for_coverage'],
-        jdk_path=config['general']['java_jdk_home']
+        app_class_names=app_class_names
+    )
+
+    # initialize map for test classes that provide coverage gain
+    tests_with_coverage_gain, total_probe_cov_gain = __compute_tests_with_coverage_gain(
+        test_class_augment_pool=test_class_augment_pool,
+        test_probe_vectors=test_probe_vectors,
+        ctd_probe_vector=ctd_probe_vector,
+        probe_index=probe_index
     )
 
     if test_class_augment_pool:
         print('')
-    tkltest_status('Coverage-contributing tests: {}/{}; total coverage gain: instruction={}, branch={}'.format(
-        len(tests_with_coverage_gain.keys()), len(test_class_augment_pool), total_inst_cov_gain, total_branch_cov_gain
+    tkltest_status('Coverage-contributing tests: {}/{}; total coverage gain: probes={}'.format(
+        len(tests_with_coverage_gain.keys()), len(test_class_augment_pool), total_probe_cov_gain
     ))
 
     # augment initial test suite with coverage-contributing tests from the augmentation pool
     augmented_coverage, added_test_classes = __augment_ctd_test_suite(
         tests_with_coverage_gain=tests_with_coverage_gain,
+        test_probe_vectors=test_probe_vectors,
+        ctd_probe_vector=ctd_probe_vector,
+        probe_index=probe_index,
         ctd_test_dir=ctd_test_dir,
         base_ctd_coverage=base_test_coverage,
         class_files=config['general']['monolith_app_path'],
         raw_cov_dir=raw_cov_data_dir,
         report_dir=report_dir,
         max_memory=config['general']['max_memory_for_coverage'],
-        jdk_path=config['general']['java_jdk_home']
+        jdk_path=config['general']['java_jdk_home'],
+        optimal=config['generate']['ctd_amplified']['optimal_augmentation']
     )
     final_test_method_count = __get_test_method_count(ctd_test_dir)
     final_inst_cov_rate = safe_div(augmented_coverage['instruction_covered'], augmented_coverage['instruction_total'])
@@ -120,24 +157,16 @@ def augment_with_code_coverage(config, build_file, build_type, ctd_test_dir, rep
         f'instruction_cov_gain={augmented_coverage["instruction_covered"] - base_test_coverage["instruction_covered"]}, ' +
         f'branch_cov_gain={augmented_coverage["branch_covered"] - base_test_coverage["branch_covered"]}'
     )
-    tkltest_status('Final test-suite coverage rate: instruction={}/{}({:.1%}), branch={}/{}({:.1%}), '.format(
-        augmented_coverage['instruction_covered'], augmented_coverage['instruction_total'],
-        final_inst_cov_rate,
-        augmented_coverage['branch_covered'], augmented_coverage['branch_total'],
-        safe_div(augmented_coverage['branch_covered'], augmented_coverage['branch_total'])
-    ) + 'line={}/{}({:.1%}), method={}/{}({:.1%})\n\t\t\t\t\t\t coverage_efficiency={} ({} test methods)'.format(
-        augmented_coverage['line_covered'], augmented_coverage['line_total'],
-        safe_div(augmented_coverage['line_covered'], augmented_coverage['line_total']),
-        augmented_coverage['method_covered'], augmented_coverage['method_total'],
-        safe_div(augmented_coverage['method_covered'], augmented_coverage['method_total']),
-        final_cov_efficiency, final_test_method_count
+    tkltest_status('Final test-suite coverage rate: {}\n\t\t\t\t\t\t coverage_efficiency={} ({} test methods)'.format(
+        __format_coverage_rates(augmented_coverage), final_cov_efficiency, final_test_method_count
     ))
 
     return True
 
 
 def __compute_base_and_augmenting_tests_coverage(ctd_test_dir, evosuite_test_dir, build_file, build_type, report_dir,
-                                                 jdk_path, class_files=None, dev_tests=None):
+                                                 jdk_path, app_class_names, class_files=None, dev_tests=None,
+                                                 coverage_cache=None):
     """Computes base test suite and augment test suite for coverage-based augmentation.
 
     Given the CTD test suite and the evosuite test suite, computes coverage efficiency of both test suites
@@ -151,13 +180,16 @@ def __compute_base_and_augmenting_tests_coverage(ctd_test_dir, evosuite_test_dir
         build_type (str): Type of build file (either ant or maven)
         report_dir (str): Main reports directory, under which coverage report is generated
         jdk_path (str): path to the jdk home to be used for executing the tests and measuring their coverage
+        app_class_names (frozenset): names of the app classes, as they occur in Jacoco execution data
         class_files (str): the class file of the app
         dev_tests (dict): information of user test suite, to add its coverage to the base tests coverage
+        coverage_cache (dict): directory and environment signature of the raw coverage data cache to use, if any
 
     Returns:
         list: test classes in the augmentation pool
         dict: coverage information for the base test suite
         str:  directory containing raw coverage data files for CTD test suite and for each of the
+        bool: whether any test in the augmentation pool covers probes of the app classes
     """
 
     # create a folder that will contain all raw coverage data files
@@ -166,6 +198,8 @@ def __compute_base_and_augmenting_tests_coverage(ctd_test_dir, evosuite_test_dir
 
     shutil.rmtree(raw_cov_data_dir, ignore_errors=True)
     os.mkdir(raw_cov_data_dir)
+    build_log_dir = os.path.join(raw_cov_data_dir, 'logs')
+    os.mkdir(build_log_dir)
 
     # get coverage info for CTD-guided test suite
     ctd_test_coverage, ctd_test_method_count, ctd_inst_cov_efficiency =\
@@ -183,58 +217,71 @@ def __compute_base_and_augmenting_tests_coverage(ctd_test_dir, evosuite_test_dir
     shutil.rmtree(ctd_test_dir_bak, ignore_errors=True)
     shutil.move(ctd_test_dir + os.sep + 'monolithic', ctd_test_dir_bak)
 
-    # initialize CTD test directory with evosuite tests for coverage data collection
-    #__initialize_test_directory(ctd_test_dir=ctd_test_dir, source_test_dir=evosuite_test_dir)
-
-    # get coverage info for evosuite tests
-    #evosuite_test_coverage, evosuite_test_method_count, evosuite_inst_cov_efficiency =\
-    #    __compute_coverage_efficiency(test_dir=ctd_test_dir, build_file=build_file, build_type=build_type,
-    #                                  report_dir=report_dir, test_suite_name='EvoSuite')
-
-    #if ctd_inst_cov_efficiency < evosuite_inst_cov_efficiency:
-        # if CTD test suite has higher efficient, it forms the initial suite and the augmentation pool
-        # consists of evosuite tests
     tkltest_status('Creating initial test suite from CTD-guided tests: {} test methods, efficiency={}'
-                       .format(ctd_test_method_count, ctd_inst_cov_efficiency))
+                   .format(ctd_test_method_count, ctd_inst_cov_efficiency))
 
-        # set evosuite tests as the augmentation pool and CTD coverage as the base coverage
-    augmentation_test_pool = [
-        os.path.join(dir, file)
-        for dir, files in coverage_util.get_test_classes(evosuite_test_dir).items()
-        for file in files if '_scaffolding' not in file
-    ]
+    # set evosuite tests as the augmentation pool and CTD coverage as the base coverage
+    # the directory is walked on each augmentation run (including a re-run with online instrumentation), as
+    # test classes may have been added or removed in any of its package directories
+    augmentation_test_pool = coverage_util.get_test_class_files(evosuite_test_dir)
 
     counter = 1
     has_coverage = False
-    for test in augmentation_test_pool:
-        with open(test) as f:
-            if 'EvoSuite did not generate any tests' in f.read():
+    # the CTD-guided tests are restored from the backup however the loop exits (including on sys.exit() on error)
+    try:
+        for test in augmentation_test_pool:
+            if __scan_test_class(test)[0]:
                 tkltest_status('EvoSuite did not generate any tests at: {}. Skipping the test '.format(test))
                 continue
-        coverage_util.add_test_class_to_ctd_suite(test_class=test, test_directory=ctd_test_dir)
-        __print_test_counter(counter)
-        counter += 1
-        test_coverage, test_method_count, inst_cov_efficiency = \
-            __compute_coverage_efficiency(test_dir=ctd_test_dir, build_file=build_file, build_type=build_type,
-                                      report_dir=report_dir, test_suite_name=os.path.basename(test)[:-5],
-                                      raw_cov_data_dir=raw_cov_data_dir, jdk_path=jdk_path)
-        if not test_coverage:
-            tkltest_status('Error while computing coverage for test: {}'.format(test), error=True)
-            __initialize_test_directory(ctd_test_dir=ctd_test_dir, source_test_dir=ctd_test_dir_bak)
-            sys.exit(1)
-
-        if test_coverage['instruction_covered'] > 0:
-            has_coverage = True
-        coverage_util.remove_test_class_from_ctd_suite(test_class=test, test_directory=ctd_test_dir)
-
-
+            __print_test_counter(counter)
+            counter += 1
+            test_name = os.path.basename(test)[:-5]
+            test_raw_cov_file = os.path.join(raw_cov_data_dir, test_name + constants.JACOCO_SUFFIX_FOR_AUGMENTATION)
+            test_coverage = None
+            if coverage_cache:
+                # the test sources are the test class and its EvoSuite scaffolding class (if any)
+                scaffolding = os.path.splitext(test)[0] + '_scaffolding.java'
+                source_files = [test, scaffolding] if os.path.isfile(scaffolding) else [test]
+                cache_key = exec_cache.get_key(source_files=source_files, build_file=build_file,
+                                               signature=coverage_cache['signature'])
+                test_coverage = exec_cache.lookup(cache_key, test_raw_cov_file, cache_dir=coverage_cache['dir'])
+            if test_coverage is not None:
+                logging.info('Using cached raw coverage data for test: {}'.format(test))
+            else:
+                coverage_util.add_test_class_to_ctd_suite(test_class=test, test_directory=ctd_test_dir)
+                # only the raw coverage data file of the test is needed, so coverage reports (and the coverage
+                # efficiency of the test) are not computed
+                if not coverage_util.get_raw_coverage_for_test_suite(
+                        build_file=build_file, build_type=build_type, test_root_dir=ctd_test_dir, report_dir=report_dir,
+                        raw_cov_data_dir=raw_cov_data_dir, raw_cov_data_file_pref=test_name,
+                        jdk_path=jdk_path, build_jvm_opts=constants.SHORT_LIVED_BUILD_JVM_OPTS,
+                        build_log_file=os.path.join(build_log_dir, test_name + '.log')):
+                    tkltest_status('Error while computing coverage for test: {}'.format(test), error=True)
+                    sys.exit(1)
+                test_coverage = {'app_probe_covered': __get_covered_probe_count(test_raw_cov_file, app_class_names)}
+                logging.info('Coverage information for {}: probes={}'.format(test, test_coverage['app_probe_covered']))
+                if coverage_cache and os.path.isfile(test_raw_cov_file):
+                    exec_cache.store(cache_key, test_raw_cov_file, test_coverage, cache_dir=coverage_cache['dir'])
+                coverage_util.remove_test_class_from_ctd_suite(test_class=test, test_directory=ctd_test_dir)
+
+            if test_coverage['app_probe_covered'] > 0:
+                has_coverage = True
+        if counter > 1:
+            __print_test_counter(counter - 1, final=True)
+    finally:
+        # restore CTD-guided tests (this also removes the backup directory created)
+        __restore_test_directory(ctd_test_dir=ctd_test_dir, backup_test_dir=ctd_test_dir_bak)
+
+    if coverage_cache:
+        exec_cache.evict(cache_dir=coverage_cache['dir'])
 
-    __initialize_test_directory(ctd_test_dir=ctd_test_dir, source_test_dir=ctd_test_dir_bak)
+    return augmentation_test_pool, ctd_test_coverage, raw_cov_data_dir, has_coverage
 
-    # remove backup directory created
-    shutil.rmtree(ctd_test_dir_bak, ignore_errors=True)
 
-    return augmentation_test_pool, ctd_test_coverage, raw_cov_data_dir, has_coverage
+def __get_classpath_jars(config):
+    """Returns the jars on the classpath of the tests: the app dependency jars and the jars of tkltest dependencies"""
+    return [class_path for class_path in build_util.get_build_classpath(config).split(os.pathsep)
+            if not os.path.isdir(class_path)]
 
 
 def __compute_coverage_efficiency(test_dir, build_file, build_type, report_dir, test_suite_name,
@@ -260,166 +307,220 @@ def __compute_coverage_efficiency(test_dir, build_file, build_type, report_dir,
     inst_cov_rate = safe_div(test_coverage['instruction_covered'], test_coverage['instruction_total'])
     test_method_count = __get_test_method_count(test_dir)
     inst_cov_efficiency = safe_div(inst_cov_rate, test_method_count)
-    tkltest_status('Coverage information for {} tests: instruction={}/{}({:.1%}), branch={}/{}({:.1%}), '.
-                   format(test_suite_name,
-                          test_coverage['instruction_covered'], test_coverage['instruction_total'],
-                          inst_cov_rate,
-                          test_coverage['branch_covered'], test_coverage['branch_total'],
-                          safe_div(test_coverage['branch_covered'], test_coverage['branch_total'])
-                          ) +
-                   'line={}/{}({:.1%}), method={}/{}({:.1%})\n\t\t\t\t\t\t coverage_efficiency={} ({} test methods)'.
-                   format(test_coverage['line_covered'], test_coverage['line_total'],
-                          safe_div(test_coverage['line_covered'], test_coverage['line_total']),
-                          test_coverage['method_covered'], test_coverage['method_total'],
-                          safe_div(test_coverage['method_covered'], test_coverage['method_total']),
-                          inst_cov_efficiency, test_method_count
-                          )
-                   )
+    tkltest_status('Coverage information for {} tests: {}\n\t\t\t\t\t\t coverage_efficiency={} ({} test methods)'.
+                   format(test_suite_name, __format_coverage_rates(test_coverage), inst_cov_efficiency,
+                          test_method_count))
 
     return test_coverage, test_method_count, inst_cov_efficiency
 
 
-def __initialize_test_directory(ctd_test_dir, source_test_dir):
-    """Clears CTD test directory and adds test classes from the given source test directory to the CTD test directory"""
-    # clear the target (ctd) directory
+def __restore_test_directory(ctd_test_dir, backup_test_dir):
+    """Restores CTD test directory from the given backup of its "monolithic" directory.
+
+    Moves the backup directory back in place (a rename if both are on the same file system) instead of copying
+    the test classes from the backup directory.
+    """
+    if not os.path.isdir(backup_test_dir):
+        return
     target_test_dir = ctd_test_dir + os.sep + 'monolithic'
     shutil.rmtree(target_test_dir, ignore_errors=True)
-    os.makedirs(target_test_dir)
-
-    # copy test classes from the source directory
-    copy_test_classes = [
-        os.path.join(dir, file)
-        for dir, files in coverage_util.get_test_classes(source_test_dir).items()
-        for file in files if '_scaffolding' not in file
-    ]
-    for test_class in copy_test_classes:
-        coverage_util.add_test_class_to_ctd_suite(test_class=test_class, test_directory=ctd_test_dir)
+    shutil.move(backup_test_dir, target_test_dir)
 
 
 def __get_test_method_count(test_dir):
-    """Returns count of test methods in all test classes in the given test directory"""
-    test_classes = [
-        os.path.join(dir, file)
-        for dir, files in coverage_util.get_test_classes(test_dir).items()
-        for file in files if '_scaffolding' not in file
-    ]
+    """Returns count of test methods in all test classes in the given test directory.
+
+    Test classes are scanned by a thread pool, so that the opens and reads of the test class files (which are
+    I/O-bound and release the GIL) overlap.
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=16) as executor:
+        return sum(test_method_count for _, test_method_count in
+                   executor.map(__scan_test_class, coverage_util.get_test_class_files(test_dir)))
+
+
+def __scan_test_class(test_class):
+    """Scans a test class for the EvoSuite no-tests marker and for test methods.
+
+    Scans the test class file once for both, and caches the result per file path, mtime, and size, so that test
+    classes of the augmentation pool are read only once. A test class rewritten with the same size and within the
+    mtime granularity of the file system is therefore not rescanned; test classes are not rewritten while
+    augmentation runs.
+
+    Args:
+        test_class (str): test class file to scan
+
+    Returns:
+        bool: whether the test class is marked by EvoSuite as having no generated tests
+        int: count of test methods in the test class
+    """
+    stat = os.stat(test_class)
+    return __scan_test_class_file(test_class, stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=4096)
+def __scan_test_class_file(test_class, mtime_ns, size):
+    is_test_method = __TEST_METHOD_ANNOTATION.match
+    no_tests = False
     test_method_count = 0
-    for test_class in test_classes:
-        with open(test_class) as f:
-            test_lines = f.readlines()
-        r = re.compile(r'[\t ]*@Test(?:\(timeout ?= ?[0-9]+\))?[\t ]*')
-        for line in test_lines:
-            if r.match(line):
+    with open(test_class) as f:
+        # the marker is in the body of the (placeholder) test method of an empty EvoSuite test suite, so the entire
+        # file is scanned for both
+        for line in f:
+            if is_test_method(line):
                 test_method_count += 1
-    return test_method_count
+            if not no_tests and 'EvoSuite did not generate any tests' in line:
+                no_tests = True
+    return no_tests, test_method_count
 
 
 
-def __compute_tests_with_coverage_gain(test_class_augment_pool, ctd_test_dir, base_ctd_coverage, class_files,
-                                       raw_cov_dir, report_dir, max_memory, jdk_path):
-    """Computes coverage delta for each test class in the augment pool of tests.
+def __load_probe_vectors(test_class_augment_pool, raw_cov_dir, app_class_names):
+    """Loads raw coverage data of the CTD test suite and of the tests in the augment pool as probe vectors.
 
-    Computes for each test class in the test augment pool additional instruction, line, and branch coverage that
-    it achieves over the base instruction, line, and branch coverage achieved by the CTD-guided tests. Returns
-    information about tests that provide coverage gain and the total instruction and branch coverage gains
-    over all tests.
+    Loads every raw coverage data file once, and flattens the loaded execution data of the app classes into probe
+    vectors over a common probe index, so that coverage gains and merges can be computed as bitwise operations on
+    the vectors. Execution data of other classes (such as the test classes) is dropped before indexing, so that it
+    does not count as coverage gain.
+    The raw coverage data files are decoded serially, in the main process: decoding in worker processes would
+    require pickling the decoded data back to the main process, which costs a large part of decoding it. Tests whose
+    raw coverage data file is missing or cannot be loaded are omitted from the returned vectors, and the tests
+    dropped due to a corrupt file are reported.
 
     Args:
         test_class_augment_pool (list): Pool of candidates tests to augment the CTD-guided test suite with
-        ctd_test_dir (str): Root directory for CTD tests
-        base_ctd_coverage (dict): Coverage achieved by the CTD tests
-        class_files (list): App classes paths
         raw_cov_dir (str): Directory containing raw coverage data files
-        report_dir (str): Main reports directory, under which coverage report is generated
-        max_memory (int): maximal memory to use for merging coverage reports
-        jdk_path (str): path to the jdk home to be used for executing the tests and measuring their coverage
+        app_class_names (frozenset): names of the app classes, as they occur in Jacoco execution data
+
+    Returns:
+        dict: probe index of the probe vectors
+        int: probe vector of the CTD test suite
+        dict: probe vectors of the tests in the augment pool
+    """
+    ctd_raw_cov_data = __load_raw_cov_data(os.path.join(raw_cov_dir,
+                                                        "CTD-guided"+constants.JACOCO_SUFFIX_FOR_AUGMENTATION))
+    if ctd_raw_cov_data is None:
+        ctd_raw_cov_data = {}
+    ctd_raw_cov_data = jacoco_merge.filter_exec_data(ctd_raw_cov_data, app_class_names)
+    test_raw_cov_data = {}
+    skipped_test_classes = []
+    for test_class in test_class_augment_pool:
+        raw_cov_file = __get_test_raw_cov_file(raw_cov_dir, test_class)
+        raw_cov_data = __load_raw_cov_data(raw_cov_file)
+        if raw_cov_data is not None:
+            test_raw_cov_data[test_class] = jacoco_merge.filter_exec_data(raw_cov_data, app_class_names)
+        elif os.path.isfile(raw_cov_file):
+            skipped_test_classes.append(test_class)
+
+    probe_index = jacoco_merge.create_probe_index([ctd_raw_cov_data] + list(test_raw_cov_data.values()))
+    ctd_probe_vector = jacoco_merge.to_probe_vector(ctd_raw_cov_data, probe_index)
+    test_probe_vectors = {}
+    for test_class, raw_cov_data in test_raw_cov_data.items():
+        try:
+            test_probe_vectors[test_class] = jacoco_merge.to_probe_vector(raw_cov_data, probe_index)
+        except ValueError as e:
+            tkltest_status('Warning: merging of jacoco output failed, skipping test file {}: {}'.format(test_class, e))
+            skipped_test_classes.append(test_class)
+    if skipped_test_classes:
+        tkltest_status('Warning: dropped coverage of {} test classes with corrupt or incompatible jacoco output: {}'.
+                       format(len(skipped_test_classes), ', '.join(sorted(skipped_test_classes))))
+    return probe_index, ctd_probe_vector, test_probe_vectors
+
+
+def __compute_tests_with_coverage_gain(test_class_augment_pool, test_probe_vectors, ctd_probe_vector, probe_index):
+    """Computes coverage delta for each test class in the augment pool of tests.
+
+    Computes for each test class in the test augment pool the number of additional Jacoco probes that it covers
+    over the probes covered by the CTD-guided tests. Test classes that cover exactly the same probes as an earlier
+    test class in the pool are coverage-equivalent to it and are skipped, so that only one test class of each
+    equivalence class is considered for augmentation. For tests that provide coverage gain, also records the
+    number of test methods in the test class, as the cost of adding the test class to the test suite. Returns
+    information about tests that provide coverage gain and the total probe coverage gain over all tests.
+
+    Args:
+        test_class_augment_pool (list): Pool of candidates tests to augment the CTD-guided test suite with
+        test_probe_vectors (dict): Probe vectors of the tests in the augment pool
+        ctd_probe_vector (int): Probe vector of the CTD tests
+        probe_index (dict): Probe index of the probe vectors
 
     Returns:
         dict: information about tests that provide coverage gain
-        int: total instruction coverage gain
-        int: total branch coverage gain
+        int: total probe coverage gain
     """
     tests_with_coverage_gain = {}
-    total_inst_cov_gain = 0
-    total_branch_cov_gain = 0
+    total_probe_cov_gain = 0
     counter = 1
+    uncovered_probe_vector = jacoco_merge.complement_probe_vector(ctd_probe_vector, probe_index)
+    if not uncovered_probe_vector:
+        # the CTD tests cover all probes, so no test class can provide coverage gain
+        logging.info('CTD tests cover all probes, no coverage gain from test classes in the augment pool')
+        return tests_with_coverage_gain, total_probe_cov_gain
+    # map from probe vector to the first test class in the pool covering exactly those probes
+    equivalent_tests = {}
     # iterate over evosuite test classes and compute coverage delta over base ctd coverage
-
-    main_coverage_dir = os.path.abspath(os.path.join(report_dir,
-                                                     constants.TKL_CODE_COVERAGE_REPORT_DIR,
-                                                     os.path.basename(ctd_test_dir)))
-
-    ctd_raw_cov_file = os.path.join(raw_cov_dir, "CTD-guided"+constants.JACOCO_SUFFIX_FOR_AUGMENTATION)
-
     for test_class in test_class_augment_pool:
 
-        # add test class to test suite
-        #coverage_util.add_test_class_to_ctd_suite(test_class=test_class, test_directory=ctd_test_dir)
         __print_test_counter(counter)
         counter += 1
 
-        test_raw_cov_file = os.path.join(raw_cov_dir,
-                                         os.path.basename(test_class)[:-5]+constants.JACOCO_SUFFIX_FOR_AUGMENTATION)
+        if test_class not in test_probe_vectors:
+            continue
 
-        # get coverage delta for test class against base CTD coverage
-        try:
-            coverage_delta, total_coverage = coverage_util.get_delta_coverage(test=test_class,
-                                                                              test_raw_cov_file=test_raw_cov_file,
-                                                                              ctd_raw_cov_file=ctd_raw_cov_file,
-                                                                              main_coverage_dir=main_coverage_dir,
-                                                                              class_files=class_files,
-                                                                              base_coverage=base_ctd_coverage,
-                                                                              remove_merged_cov_file=True,
-                                                                              max_memory=max_memory,
-                                                                              jdk_path=jdk_path)
-            #coverage_delta = coverage_util.get_coverage_for_test_suite(
-            #    build_file=build_file, build_type=build_type, test_root_dir=ctd_test_dir,
-            #    report_dir=report_dir, base_coverage=base_ctd_coverage)
-            if coverage_delta['instruction_cov_delta'] > 0 or coverage_delta['branch_cov_delta'] > 0:
-                logging.info('Coverage gain from test class {}: instruction={}, branch={}'.format(
-                    test_class, coverage_delta['instruction_cov_delta'], coverage_delta['branch_cov_delta']))
-                tests_with_coverage_gain[test_class] = coverage_delta
-                total_inst_cov_gain += coverage_delta['instruction_cov_delta']
-                total_branch_cov_gain += coverage_delta['branch_cov_delta']
-            else:
-                logging.info('No coverage gain from test class {}'.format(test_class))
-        except subprocess.CalledProcessError as e:
-            logging.error('Error running augmented test suite with class {}: {}'.format(test_class, e))
+        test_probe_vector = test_probe_vectors[test_class]
+        equivalent_test = equivalent_tests.setdefault(test_probe_vector, test_class)
+        if equivalent_test != test_class:
+            logging.info('Test class {} has the same coverage as test class {}'.format(test_class, equivalent_test))
+            continue
 
-        # remove test class from test suite
-        #coverage_util.remove_test_class_from_ctd_suite(test_class=test_class, test_directory=ctd_test_dir)
+        # get coverage delta for test class against base CTD coverage
+        probe_cov_delta = jacoco_merge.popcount(test_probe_vector & uncovered_probe_vector)
+        if probe_cov_delta > 0:
+            logging.info('Coverage gain from test class {}: probes={}'.format(test_class, probe_cov_delta))
+            tests_with_coverage_gain[test_class] = {
+                'probe_cov_delta': probe_cov_delta,
+                'test_method_count': __scan_test_class(test_class)[1]
+            }
+            total_probe_cov_gain += probe_cov_delta
+        else:
+            logging.info('No coverage gain from test class {}'.format(test_class))
+    if counter > 1:
+        __print_test_counter(counter - 1, final=True)
 
-    return tests_with_coverage_gain, total_inst_cov_gain, total_branch_cov_gain
+    return tests_with_coverage_gain, total_probe_cov_gain
 
 
-def __augment_ctd_test_suite(tests_with_coverage_gain, ctd_test_dir, base_ctd_coverage, class_files,
-                             raw_cov_dir, report_dir, max_memory, jdk_path):
+def __augment_ctd_test_suite(tests_with_coverage_gain, test_probe_vectors, ctd_probe_vector, probe_index,
+                             ctd_test_dir, base_ctd_coverage, class_files, raw_cov_dir, report_dir, max_memory,
+                             jdk_path, optimal=False):
     """Augments CTD test suite with tests that contribute to additional coverage.
 
-    Iterates over test classes that contribute to coverage gain, and adds them to the augmented test suite
-    one at a time, ignoring tests that don't increase coverage of the augmented test suite (although they
-    did over the base test suite). Returns information about augmented coverage and count of added test
-    classes.
+    Adds test classes that contribute to coverage gain to the augmented test suite one at a time, in decreasing
+    order of their coverage gain per test method over the base test suite (or, if optimal is set, each time
+    selecting the test class with the highest coverage gain per test method over the augmented test suite),
+    and ignoring tests that don't increase coverage of the augmented test suite (although they did over the
+    base test suite). Scoring coverage gain per test method favors test classes that achieve the same coverage
+    with fewer test methods, which keeps the augmented test suite small.
+    The probe vectors of added tests are merged into the probe vector of the
+    augmented test suite, and a coverage report is created once for the merged raw coverage data of the
+    augmented test suite. Returns information about augmented coverage and count of added test classes.
 
     Args:
         tests_with_coverage_gain (dict): Tests that provide coverage gain over base CTD coverage
+        test_probe_vectors (dict): Probe vectors of the tests in the augment pool
+        ctd_probe_vector (int): Probe vector of the CTD tests
+        probe_index (dict): Probe index of the probe vectors
         ctd_test_dir (str): Root directory for CTD tests
         base_ctd_coverage (dict): Coverage achieved by the CTD tests
         class_files (list): App classes paths
         raw_cov_dir (str): Directory containing raw coverage data files
         report_dir (str): Main reports directory, under which coverage report is generated
-        max_memory (int):
+        max_memory (int): maximal memory to use for creating the coverage report
         jdk_path (str): path to the jdk home to be used for executing the tests and measuring their coverage
+        optimal (bool): whether to select test classes by their coverage gain over the augmented test suite
 
     Returns:
         dict: information about coverage of augmented test suite
         int: total test classes added to CTD test suite
     """
-    # create augmented test directory, initialize it with CTD-guided tests
-    # augmented_test_dir = ctd_test_dir + '-coverage-augmented'
-    # shutil.rmtree(augmented_test_dir, ignore_errors=True)
-    # shutil.copytree(ctd_test_dir, augmented_test_dir)
-
     if tests_with_coverage_gain:
         tkltest_status('Augmenting "{}" with tests from the augmentation pool that contribute to coverage gain'
                        .format(ctd_test_dir))
@@ -428,81 +529,153 @@ def __augment_ctd_test_suite(tests_with_coverage_gain, ctd_test_dir, base_ctd_co
                                                      constants.TKL_CODE_COVERAGE_REPORT_DIR,
                                                      os.path.basename(ctd_test_dir)))
 
-    current_raw_cov_file = os.path.join(raw_cov_dir, "CTD-guided" + constants.JACOCO_SUFFIX_FOR_AUGMENTATION)
-
-    # group test cases by (instruction+branch) coverage gain and create reverse sorted list of gain values
-    grouped_tests_with_cov_gain, ordered_cov_gain_values = __group_tests_by_coverage_gain(tests_with_coverage_gain)
-
-    curr_coverage = base_ctd_coverage
-    augmented_coverage = base_ctd_coverage
+    # probes not covered by the augmented test suite
+    uncovered_probe_vector = jacoco_merge.complement_probe_vector(ctd_probe_vector, probe_index)
+    selected_test_classes, uncovered_probe_vector = __select_tests(
+        tests_with_coverage_gain=tests_with_coverage_gain,
+        test_probe_vectors=test_probe_vectors,
+        uncovered_probe_vector=uncovered_probe_vector,
+        optimal=optimal
+    )
     added_test_classes = 0
-    counter = 1
-    first=True
-    for cov_val in ordered_cov_gain_values:
-        for test_class in grouped_tests_with_cov_gain[cov_val]:
-            coverage_util.add_test_class_to_ctd_suite(test_class=test_class,
-                                                      test_directory=ctd_test_dir)
-            __print_test_counter(counter)
-            counter += 1
-
-            test_raw_cov_file = os.path.join(raw_cov_dir,
-                                        os.path.basename(test_class)[:-5] + constants.JACOCO_SUFFIX_FOR_AUGMENTATION)
-
-            try:
-                coverage_delta, augmented_coverage = coverage_util.get_delta_coverage(
-                    test=test_class, test_raw_cov_file=test_raw_cov_file,
-                    ctd_raw_cov_file=current_raw_cov_file,
-                    main_coverage_dir=main_coverage_dir, class_files=class_files,
-                    base_coverage=curr_coverage,
-                    remove_merged_cov_file=first,
-                    max_memory=max_memory, jdk_path=jdk_path)
-                first = False
-            except subprocess.CalledProcessError as e:
-                logging.error('Error merging augmented test suite with class {}: {}'.format(test_class, e))
-
-            if coverage_delta['instruction_cov_delta'] > 0 or coverage_delta['branch_cov_delta'] > 0:
-                curr_coverage = augmented_coverage
-                added_test_classes += 1
-            else:
-                coverage_util.remove_test_class_from_ctd_suite(test_class=test_class, test_directory=ctd_test_dir)
+    for test_class in selected_test_classes:
+        added_test_classes += 1
+        __print_test_counter(added_test_classes)
+        coverage_util.add_test_class_to_ctd_suite(test_class=test_class, test_directory=ctd_test_dir)
 
-            current_raw_cov_file = os.path.join(raw_cov_dir, constants.JACOCO_MERGED_DATA_FOR_AUGMENTATION)
+    if not added_test_classes:
+        return base_ctd_coverage, added_test_classes
+    __print_test_counter(added_test_classes, final=True)
+
+    # create coverage report for the merged raw coverage data of the augmented test suite
+    augmented_probe_vector = jacoco_merge.complement_probe_vector(uncovered_probe_vector, probe_index)
+    augmented_raw_cov_file = os.path.join(raw_cov_dir, constants.JACOCO_MERGED_DATA_FOR_AUGMENTATION)
+    jacoco_merge.write_exec_file(augmented_raw_cov_file,
+                                 jacoco_merge.from_probe_vector(augmented_probe_vector, probe_index))
+    try:
+        augmented_coverage = coverage_util.get_coverage_from_exec_file(exec_file=augmented_raw_cov_file,
+                                                                       main_coverage_dir=main_coverage_dir,
+                                                                       report_name=os.path.basename(ctd_test_dir),
+                                                                       class_files=class_files,
+                                                                       jdk_path=jdk_path,
+                                                                       max_memory=max_memory)
+    except subprocess.CalledProcessError as e:
+        tkltest_status('Error creating coverage report for augmented test suite: {}\n{}'.format(e, e.stderr),
+                       error=True)
+        sys.exit(1)
 
     return augmented_coverage, added_test_classes
 
 
-def __group_tests_by_coverage_gain(tests_with_coverage_gain):
-    """Groups test cases by their coverage gain values.
+def __select_tests(tests_with_coverage_gain, test_probe_vectors, uncovered_probe_vector, optimal=False):
+    """Selects the test classes to augment the test suite with.
 
-    Groups test cases by the coverage gain values, computed as sum of instruction and branch coverage gains.
-    Returns grouped test cases and reverse sorted list of coverage gain values.
+    Goes over the test classes in decreasing order of their coverage gain per test method over the base test suite,
+    and selects each test class that covers probes not covered by the test classes selected before it. If optimal
+    is set, instead each time selects the test class with the highest coverage gain per test method over the
+    test classes selected so far (lazy greedy selection). Ties are broken by the order of tests_with_coverage_gain.
+    Selection stops when all probes are covered.
 
     Args:
-        tests_with_coverage_gain: Coverage gain information about test cases
+        tests_with_coverage_gain (dict): Tests that provide coverage gain over the base test suite
+        test_probe_vectors (dict): Probe vectors of the tests
+        uncovered_probe_vector (int): Probe vector of the probes not covered by the base test suite
+        optimal (bool): whether to select test classes by their coverage gain over the selected test classes
 
     Returns:
-        dict: test cases grouped by coverage gain values
-        list: reverse sorted list of coverage gain values
+        list: selected test classes, in the order of selection
+        int: probe vector of the probes not covered by the base test suite and the selected test classes
     """
-    grouped_tests_with_cov_gain = {}
-    cov_gain_values = []
-    for test_class in tests_with_coverage_gain.keys():
-        test_cov_gain = tests_with_coverage_gain[test_class]['instruction_cov_delta'] + \
-                        tests_with_coverage_gain[test_class]['branch_cov_delta']
-        if test_cov_gain not in grouped_tests_with_cov_gain.keys():
-            grouped_tests_with_cov_gain[test_cov_gain] = [test_class]
-            cov_gain_values.append(test_cov_gain)
-        else:
-            grouped_tests_with_cov_gain[test_cov_gain].append(test_class)
-    cov_gain_values.sort(reverse=True)
-    return grouped_tests_with_cov_gain, cov_gain_values
-
-
-def __print_test_counter(counter):
+    # cost of adding a test class to the augmented test suite
+    test_costs = {
+        test_class: max(1, coverage_delta['test_method_count'])
+        for test_class, coverage_delta in tests_with_coverage_gain.items()
+    }
+
+    # queue of (negated coverage gain per test method, position in pool, test class, number of selected test
+    # classes at the time the gain was computed); ties are broken by the order of the augmentation pool. For
+    # lazy greedy selection the queue is a priority queue, for a single sweep it is simply sorted once
+    cov_gain_queue = [
+        (-coverage_delta['probe_cov_delta'] / test_costs[test_class], position, test_class, 0)
+        for position, (test_class, coverage_delta) in enumerate(tests_with_coverage_gain.items())
+    ]
+    if optimal:
+        heapq.heapify(cov_gain_queue)
+        next_test = functools.partial(heapq.heappop, cov_gain_queue)
+    else:
+        cov_gain_queue.sort(reverse=True)
+        next_test = cov_gain_queue.pop
+
+    selected_test_classes = []
+    while cov_gain_queue:
+        neg_cov_score, position, test_class, computed_at = next_test()
+        test_probe_vector = test_probe_vectors[test_class]
+        if not optimal:
+            # single sweep in decreasing order of coverage gain per test method over the base test suite
+            if not test_probe_vector & uncovered_probe_vector:
+                continue
+        elif computed_at != len(selected_test_classes):
+            # gain is stale: recompute it over the augmented test suite and requeue the test class
+            cov_gain = jacoco_merge.popcount(test_probe_vector & uncovered_probe_vector)
+            if cov_gain > 0:
+                heapq.heappush(cov_gain_queue,
+                               (-cov_gain / test_costs[test_class], position, test_class,
+                                len(selected_test_classes)))
+            continue
+
+        uncovered_probe_vector ^= test_probe_vector & uncovered_probe_vector
+        selected_test_classes.append(test_class)
+        if not uncovered_probe_vector:
+            # all probes are covered, so no remaining test class can increase coverage
+            break
+
+    return selected_test_classes, uncovered_probe_vector
+
+
+def __get_test_raw_cov_file(raw_cov_dir, test_class):
+    """Returns the raw coverage data file created for the given test class"""
+    return os.path.join(raw_cov_dir, os.path.basename(test_class)[:-5] + constants.JACOCO_SUFFIX_FOR_AUGMENTATION)
+
+
+def __load_raw_cov_data(raw_cov_file):
+    """Loads raw coverage data file; returns None if the file does not exist or cannot be loaded"""
+    if not os.path.isfile(raw_cov_file):
+        logging.info('Raw coverage data file {} does not exist'.format(raw_cov_file))
+        return None
+    try:
+        return jacoco_merge.load_exec_file(raw_cov_file)
+    except (OSError, ValueError) as e:
+        tkltest_status('Warning: loading of jacoco output {} failed, skipping it: {}'.format(raw_cov_file, e))
+        return None
+
+
+def __get_covered_probe_count(raw_cov_file, class_names):
+    """Returns number of probes of the given classes covered in a raw coverage data file; 0 if the file does not
+    exist or cannot be loaded"""
+    try:
+        return jacoco_merge.get_covered_probe_count(
+            jacoco_merge.filter_exec_data(jacoco_merge.load_exec_file(raw_cov_file), class_names))
+    except (OSError, ValueError):
+        return 0
+
+
+def __format_coverage_rates(coverage):
+    """Returns covered/total counts and coverage rates for instructions, branches, lines, and methods"""
+    rates = []
+    for counter in ('instruction', 'branch', 'line', 'method'):
+        covered = coverage[counter + '_covered']
+        total = coverage[counter + '_total']
+        rates.append('{}={}/{}({:.1%})'.format(counter, covered, total, safe_div(covered, total)))
+    return ', '.join(rates)
+
+
+def __print_test_counter(counter, final=False):
     # print('.', end='', flush=True)
-    sys.stdout.write('\r')
-    sys.stdout.write('* {}'.format(counter))
-    sys.stdout.flush()
+    # updated every tenth test only, to avoid a write and flush of stdout for every test of a large pool; the final
+    # count is printed after the last test
+    if final or counter == 1 or counter % 10 == 0:
+        sys.stdout.write('\r* {}'.format(counter))
+        sys.stdout.flush()
 
 def safe_div(a, b):
     if b:
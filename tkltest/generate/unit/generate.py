@@ -178,26 +178,23 @@ def generate_ctd_amplified_tests(config, output_dir):
 
     if not config['generate']['ctd_amplified']['no_ctd_coverage']:
         app_name = config['general']['app_name']
+        ctd_report_dir = app_name + constants.TKLTEST_MAIN_REPORT_DIR_SUFFIX + os.sep + constants.TKL_CTD_REPORT_DIR
 
         if os.path.exists(os.path.abspath(app_name+constants.TKL_EXTENDER_COVERAGE_FILE_SUFFIX)):
             generate_ctd_coverage(os.path.abspath(app_name+constants.TKL_EXTENDER_COVERAGE_FILE_SUFFIX),
                                   os.path.abspath(app_name + "_ctd_models_and_test_plans.json"),
-                                  app_name + constants.TKLTEST_MAIN_REPORT_DIR_SUFFIX + os.sep +
-                                  constants.TKL_CTD_REPORT_DIR)
+                                  ctd_report_dir)
         else:
             tkltest_status('Cannot generate CTD coverage report because coverage file was not located', error=True)
             sys.exit(1)
 
         shutil.move(app_name + constants.TKL_EXTENDER_COVERAGE_FILE_SUFFIX,
-                    os.path.join(app_name + constants.TKLTEST_MAIN_REPORT_DIR_SUFFIX + os.sep +
-                                  constants.TKL_CTD_REPORT_DIR,
-                                 app_name + constants.TKL_EXTENDER_COVERAGE_FILE_SUFFIX))
+                    os.path.join(ctd_report_dir, app_name + constants.TKL_EXTENDER_COVERAGE_FILE_SUFFIX))
 
         # combinatorial coverage file may not exist if no methods have more than one test plan row
         if os.path.exists(app_name + constants.TKL_EXTENDER_CTD_COVERAGE_FILE_SUFFIX):
             shutil.move(app_name + constants.TKL_EXTENDER_CTD_COVERAGE_FILE_SUFFIX,
-                    os.path.join(app_name + constants.TKLTEST_MAIN_REPORT_DIR_SUFFIX + os.sep +
-                    constants.TKL_CTD_REPORT_DIR, app_name + constants.TKL_EXTENDER_CTD_COVERAGE_FILE_SUFFIX))
+                        os.path.join(ctd_report_dir, app_name + constants.TKL_EXTENDER_CTD_COVERAGE_FILE_SUFFIX))
 
     # we create this directory, so it will be at the build files, and will be later used for augmentation
     if not os.path.isdir(os.path.join(test_directory, 'monolithic')):
@@ -213,10 +210,11 @@ def generate_ctd_amplified_tests(config, output_dir):
     else:
         reports_dir = app_name+constants.TKLTEST_MAIN_REPORT_DIR_SUFFIX
 
+    app_classpath = build_util.get_build_classpath(config)
     ant_build_file, maven_build_file, gradle_build_file = build_util.generate_build_xml(
         app_name=app_name,
         monolith_app_path=monolith_app_path,
-        app_classpath=build_util.get_build_classpath(config),
+        app_classpath=app_classpath,
         test_root_dir=test_directory,
         test_dirs=test_dirs,
         partitions_file=partitions_file,
@@ -251,7 +249,7 @@ def generate_ctd_amplified_tests(config, output_dir):
             build_util.generate_build_xml(
                 app_name=app_name,
                 monolith_app_path=monolith_app_path,
-                app_classpath=build_util.get_build_classpath(config),
+                app_classpath=app_classpath,
                 test_root_dir=test_directory,
                 test_dirs=test_dirs,
                 partitions_file=partitions_file,
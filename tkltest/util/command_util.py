@@ -16,16 +16,20 @@ import sys
 import shlex
 import os
 
-def run_command(command, verbose, env_vars=None):
+def run_command(command, verbose, env_vars=None, log_path=None):
     """Runs a command using subprocess.
 
     Runs the given command using subprocess.run(). If verbose is false, stdout is
-    discarded. A pipe is opened to stderr of the subprocess so that the subprocess
-    error messages can be captured and printed by the CLI if the command fails.
-    If env_vars is specified, the command is executed under the given environment
-    variable values
+    discarded, or written to the file log_path if specified. A pipe is opened to stderr
+    of the subprocess so that the subprocess error messages can be captured and printed
+    by the CLI if the command fails. If env_vars is specified, the command is executed
+    under the given environment variable values
     """
-    if verbose:
+    if not verbose and log_path:
+        with open(log_path, 'wb') as log_file:
+            subprocess.run(command, shell=True, check=True, stdout=log_file, stderr=subprocess.PIPE,
+                           env=env_vars, encoding=sys.getfilesystemencoding())
+    elif verbose:
         if env_vars:
             subprocess.run(command, shell=True, check=True, stderr=subprocess.PIPE, env=env_vars,
                            encoding=sys.getfilesystemencoding())
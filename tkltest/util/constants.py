@@ -11,7 +11,9 @@
 # limitations under the License.
 # ***************************************************************************
 
+import functools
 import os
+from types import MappingProxyType
 
 # name of default config file
 TKLTEST_DEFAULT_CONFIG_FILE='tkltest_config.toml'
@@ -21,15 +23,11 @@ TKLTEST_GENERATE_CONFIG_FILE='.tkltest_generate.toml'
 
 TKLTEST_UNIT_OUTPUT_DIR_PREFIX = 'tkltest-output-unit-'
 
-# cli lib download dir
-TKLTEST_CLI_DIR = os.getcwd()
-TKLTEST_LIB_DIR = os.path.join(TKLTEST_CLI_DIR, 'lib')
-TKLTEST_LIB_DOWNLOAD_DIR = os.path.join(TKLTEST_LIB_DIR, 'download')
+# cli lib download dir: TKLTEST_CLI_DIR, TKLTEST_LIB_DIR, and TKLTEST_LIB_DOWNLOAD_DIR are computed on first
+# access (see get_cli_dir() and __getattr__ below)
 
-# version of unit testgen core
+# version of unit testgen core; TKLTEST_UNIT_CORE_JAR is computed on first access (see __getattr__ below)
 TKLTEST_UNIT_CORE_VERSION = '1.1.0'
-TKLTEST_UNIT_CORE_JAR = os.path.join(TKLTEST_LIB_DOWNLOAD_DIR,
-                                     'tackle-test-generator-unit-{}.jar'.format(TKLTEST_UNIT_CORE_VERSION))
 
 # suffix for the default test directory name (used if test directory is unspecified)
 # CTD amplified tests
@@ -71,16 +69,20 @@ TKL_EXTENDER_CTD_COVERAGE_FILE_SUFFIX = '_ctd_coverage_report.json'
 # suffix of name of summary file created by the sequence extender
 TKL_EXTENDER_SUMMARY_FILE_SUFFIX = '_test_generation_summary.json'
 
+# name of the directory, in the tkltest output directory, containing the keys of the build files generated for
+# test directories (a file per test directory)
+TKL_BUILD_FILES_KEYS_DIR = '.tkltest_build_files_keys'
+
 # name of test generator indicating use of all existing test generators in concert
 COMBINED_TEST_GENERATOR_NAME = 'CombinedTestGenerator'
 
 # mapping of base test generator names specified in CLI option to the internal name
-# or name of the corresponding code component
-BASE_TEST_GENERATORS = {
+# or name of the corresponding code component (read-only)
+BASE_TEST_GENERATORS = MappingProxyType({
     'combined': COMBINED_TEST_GENERATOR_NAME,
     'evosuite': 'EvoSuiteTestGenerator',
     'randoop': 'RandoopTestGenerator'
-}
+})
 
 # suffix for the file containing the CTD model and test plan
 ERROR_PATTERNS_FILE = 'errorPatterns.json'
@@ -100,7 +102,7 @@ ACTS_VERSION = '3.2'
 # maven version used for creating maven build file
 MAVEN_VERSION = "4.0.0"
 
-# Jacoco for maven used version
+# Jacoco used version (for maven and for the Jacoco jars)
 
 JACOCO_MAVEN_VERSION = "0.8.7"
 
@@ -130,7 +132,7 @@ TEST_PLAN_SUMMARY_NAME = "test-plan-summary.html"
 
 # Java version enforced in maven build files
 
-JAVA_VERSION_FOR_MAVEN = 1.8
+JAVA_VERSION_FOR_MAVEN = "1.8"
 
 # Suffix for jacoco.exec files used in test augmentation
 
@@ -140,9 +142,28 @@ JACOCO_SUFFIX_FOR_AUGMENTATION = '_jacoco.exec'
 
 JACOCO_MERGED_DATA_FOR_AUGMENTATION = 'ctd-guided-augmented.exec'
 
+# JVM options for the build processes that run single test classes during test augmentation:
+# such processes are short-lived, so JIT compilation is limited to the client compiler and
+# class data sharing is used to reduce JVM startup time
+
+SHORT_LIVED_BUILD_JVM_OPTS = '-XX:TieredStopAtLevel=1 -Xshare:auto'
+
+# Cache of raw coverage data files of test classes in the augmentation pool, reused across runs
+# of test augmentation for unchanged test classes; capacity of the cache in bytes. The default cache
+# directory TKLTEST_EXEC_CACHE_DIR (under the user home directory) is computed on first access (see
+# __getattr__ below)
+
+TKLTEST_EXEC_CACHE_MAX_SIZE = 10 * 1024 ** 3
+
+# JVM options for running the Jacoco CLI: the class data of the CLI is archived on the first run and shared
+# by later runs to reduce JVM startup time (on JDK 19+; the options are ignored by JVMs that do not support
+# them). The archive is written to a per-user directory (see get_user_dir() below) rather than next to the
+# CLI jar, whose directory may be shared and not writable; JACOCO_CLI_JVM_OPTS is computed on first access
+# (see __getattr__ below)
+
 # Name of Jacoco CLI jar
 
-JACOCO_CLI_JAR_NAME = 'org.jacoco.cli-0.8.7-nodeps.jar'
+JACOCO_CLI_JAR_NAME = 'org.jacoco.cli-{}-nodeps.jar'.format(JACOCO_MAVEN_VERSION)
 
 ####### tkltest-ui constants #######
 
@@ -170,3 +191,74 @@ CRAWLJAX_API_TEST_FILE = os.path.join('src', 'test', 'java', 'generated', 'Gener
 SELENIUM_API_TEST_ROOT = 'selenium-api-tests'
 SELENIUM_API_TEST_CLASS_DIR = os.path.join(SELENIUM_API_TEST_ROOT, 'src', 'test', 'java', 'generated')
 SELENIUM_API_TEST_FILE = os.path.join(SELENIUM_API_TEST_CLASS_DIR, 'GeneratedTests.java')
+
+####### constants computed on first access #######
+
+# constants that depend on the cli directory are computed on first access, so that importing this module does
+# not access the file system (paths under the lib dir are appended with os.sep directly as the lib dir never ends
+# with a separator, unlike the cli dir, which can be a root directory)
+
+@functools.lru_cache(maxsize=None)
+def get_cli_dir():
+    """Returns the cli directory.
+
+    The cli directory is the working directory at the time of the first call, and stays the same when the
+    working directory changes later (the cli changes the working directory only after getting the cli directory).
+    """
+    return os.getcwd()
+
+
+@functools.lru_cache(maxsize=None)
+def get_lib_dir():
+    """Returns the cli lib dir"""
+    return os.path.join(get_cli_dir(), 'lib')
+
+
+@functools.lru_cache(maxsize=None)
+def get_lib_download_dir():
+    """Returns the cli lib download dir"""
+    return get_lib_dir() + os.sep + 'download'
+
+
+@functools.lru_cache(maxsize=None)
+def get_unit_core_jar():
+    """Returns the path of the unit testgen core jar"""
+    return get_lib_download_dir() + os.sep + 'tackle-test-generator-unit-{}.jar'.format(TKLTEST_UNIT_CORE_VERSION)
+
+
+@functools.lru_cache(maxsize=None)
+def get_user_dir():
+    """Returns the per-user tkltest directory, for data kept across runs"""
+    return os.path.join(os.path.expanduser('~'), '.tkltest')
+
+
+def get_jacoco_cli_jvm_opts():
+    """Returns the JVM options for running the Jacoco CLI; creates the user directory for the class data archive"""
+    try:
+        os.makedirs(get_user_dir(), exist_ok=True)
+    except OSError:
+        # the JVM runs without writing the archive
+        pass
+    archive_file = os.path.join(get_user_dir(), 'jacococli-{}.jsa'.format(JACOCO_MAVEN_VERSION))
+    return '-XX:+IgnoreUnrecognizedVMOptions -XX:+AutoCreateSharedArchive -XX:SharedArchiveFile={}'.format(archive_file)
+
+
+__LAZY_CONSTANTS = {
+    'TKLTEST_CLI_DIR': get_cli_dir,
+    'TKLTEST_LIB_DIR': get_lib_dir,
+    'TKLTEST_LIB_DOWNLOAD_DIR': get_lib_download_dir,
+    'TKLTEST_UNIT_CORE_JAR': get_unit_core_jar,
+    'JACOCO_CLI_JVM_OPTS': get_jacoco_cli_jvm_opts,
+    'TKLTEST_EXEC_CACHE_DIR': lambda: os.path.join(get_user_dir(), 'exec_cache'),
+}
+
+
+def __getattr__(name):
+    """Provides the constants computed on first access as module attributes (e.g., constants.TKLTEST_CLI_DIR).
+
+    The value is stored in the module on first access, so that later accesses do not get here.
+    """
+    if name not in __LAZY_CONSTANTS:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    value = globals()[name] = __LAZY_CONSTANTS[name]()
+    return value
@@ -11,6 +11,8 @@
 # limitations under the License.
 # ***************************************************************************
 
+import functools
+import hashlib
 import json
 import logging
 import os
@@ -32,7 +34,7 @@ def __get_jars_for_tests_execution():
 
     required_lib_jars = {
         constants.JACOCO_CLI_JAR_NAME,
-        'org.jacoco.agent-0.8.7.jar',
+        'org.jacoco.agent-' + constants.JACOCO_MAVEN_VERSION + '.jar',
         'junit-4.13.1.jar',
         'hamcrest-all-1.3.jar',
         'evosuite-standalone-runtime-' + constants.EVOSUITE_VERSION + '.jar',
@@ -40,10 +42,19 @@ def __get_jars_for_tests_execution():
     }
 
     return [
-        os.path.join(os.path.abspath(dp), f) for dp, dn, filenames in os.walk(constants.TKLTEST_LIB_DIR) for f in filenames
-        if os.path.splitext(f)[1] == '.jar' and f in required_lib_jars
+        jar for jar in __get_lib_jars(constants.TKLTEST_LIB_DIR) if os.path.basename(jar) in required_lib_jars
     ]
 
+
+@functools.lru_cache(maxsize=None)
+def __get_lib_jars(lib_dir):
+    """Returns all jars under the given lib directory; the result is cached as the lib directory does not
+    change while the CLI is running"""
+    return tuple(
+        os.path.join(os.path.abspath(dp), f) for dp, dn, filenames in os.walk(lib_dir) for f in filenames
+        if os.path.splitext(f)[1] == '.jar'
+    )
+
 def get_build_classpath(config, subcommand='ctd-amplified', partition=None):
     """Creates and returns build classpath.
 
@@ -109,6 +120,10 @@ def generate_build_xml(app_name, monolith_app_path, app_classpath, test_root_dir
         collect_codecoverage: whether to collect code coverage data
         offline_instrumentation whether to perform offline instrumentation of app classes
         output_dir: running directory
+
+    The build files are not regenerated if they were generated for the same arguments (and app reported
+    packages) by an earlier call and were not modified since. The key of the generated build files is kept
+    in output_dir, not in the test directory.
     """
     if partitions_file:
         with open(app_name + constants.TKL_CTD_TEST_PLAN_FILE_SUFFIX) as ctd_model:
@@ -123,6 +138,18 @@ def generate_build_xml(app_name, monolith_app_path, app_classpath, test_root_dir
 
     # set the build xml file name and content based on the build file
     ant_build_xml_file = test_root_dir + os.sep + 'build.xml'
+    maven_build_xml_file = test_root_dir + os.sep + 'pom.xml'
+    gradle_build_file = test_root_dir + os.sep + 'build.gradle'
+
+    build_files_key = __get_build_files_key(app_name, monolith_app_path, app_classpath, test_root_dir, test_dirs,
+                                            app_reported_packages, main_reports_dir, app_packages,
+                                            collect_codecoverage, offline_instrumentation, output_dir)
+    build_files_key_file = os.path.join(output_dir, constants.TKL_BUILD_FILES_KEYS_DIR, hashlib.sha256(
+        os.path.abspath(test_root_dir).encode('utf-8', errors='surrogateescape')).hexdigest())
+    if __is_build_files_key_current(build_files_key, build_files_key_file,
+                                     [ant_build_xml_file, maven_build_xml_file, gradle_build_file]):
+        logging.info('Build files in {} are up to date'.format(test_root_dir))
+        return ant_build_xml_file, maven_build_xml_file, gradle_build_file
     # if micro:
     #     build_xml_file += 'micro.xml'
     # else:
@@ -138,17 +165,45 @@ def generate_build_xml(app_name, monolith_app_path, app_classpath, test_root_dir
     with open(ant_build_xml_file, 'w') as outp:
         outp.write(content)
 
-    maven_build_xml_file = test_root_dir + os.sep + 'pom.xml'
     __build_maven(app_classpath, app_name, monolith_app_path, test_root_dir, test_dirs, collect_codecoverage,
                   app_packages, app_reported_packages, offline_instrumentation, main_reports_dir, maven_build_xml_file,output_dir)
 
-    gradle_build_file = test_root_dir + os.sep + 'build.gradle'
     __build_gradle(app_classpath, app_name, monolith_app_path, test_root_dir, test_dirs, collect_codecoverage,
                   app_packages, offline_instrumentation, main_reports_dir, gradle_build_file, output_dir)
 
+    # written after the build files, so that later modification of a build file invalidates the key
+    os.makedirs(os.path.dirname(build_files_key_file), exist_ok=True)
+    with open(build_files_key_file, 'w') as f:
+        f.write(build_files_key)
+
     return ant_build_xml_file, maven_build_xml_file, gradle_build_file
 
 
+def __get_build_files_key(*build_args):
+    """Returns a hash of the arguments of build files generation, the working directory, and the build templates"""
+    digest = hashlib.sha256(repr((build_args, os.getcwd())).encode('utf-8', errors='surrogateescape'))
+    for template_file in [__file__, constants.__file__,
+                          os.path.join(constants.TKLTEST_CLI_DIR, 'tkltest', 'util', 'unit', 'build_template.gradle')]:
+        try:
+            with open(template_file, 'rb') as f:
+                digest.update(f.read())
+        except OSError:
+            pass
+    return digest.hexdigest()
+
+
+def __is_build_files_key_current(build_files_key, build_files_key_file, build_files):
+    """Checks whether the build files were generated with the given key and not modified since"""
+    try:
+        with open(build_files_key_file) as f:
+            if f.read() != build_files_key:
+                return False
+        key_mtime = os.stat(build_files_key_file).st_mtime_ns
+        return all(os.stat(build_file).st_mtime_ns <= key_mtime for build_file in build_files)
+    except OSError:
+        return False
+
+
 def __build_ant(classpath_list, app_name, monolith_app_paths, test_root_src_dir, test_src_dirs, collect_codecoverage,
                 app_collected_packages, app_reported_classes, offline_instrumentation, report_output_dir,
                 build_xml_file, output_dir):
@@ -163,7 +218,8 @@ def __build_ant(classpath_list, app_name, monolith_app_paths, test_root_src_dir,
 
         with tag('taskdef', uri="antlib:org.jacoco.ant", resource="org/jacoco/ant/antlib.xml"):
             doc.stag('classpath', path=os.path.abspath(os.path.join(constants.TKLTEST_LIB_DOWNLOAD_DIR,
-                                                                    "org.jacoco.ant-0.8.7-nodeps.jar")))
+                                                                    "org.jacoco.ant-" + constants.JACOCO_MAVEN_VERSION +
+                                                                    "-nodeps.jar")))
 
         with tag('path', id='classpath'):
             for current_str in classpath_list:
@@ -507,7 +563,8 @@ def __build_gradle(classpath_list, app_name, monolith_app_paths, test_root_dir,
                         coverage_xml_file=coverage_xml_file,
                         coverage_csv_file=coverage_csv_file,
                         test_dependsOn=test_dependsOn,
-                        final_task=final_task)
+                        final_task=final_task,
+                        jacoco_version=constants.JACOCO_MAVEN_VERSION)
 
     with open(build_gradle_file, 'w') as outfile:
         outfile.write(s)
@@ -369,7 +369,7 @@ __options_spec = {
                     'short_name': '-btg',
                     'long_name': '--base-test-generator',
                     'type': str,
-                    'choices': ['combined', 'evosuite', 'randoop'],
+                    'choices': list(constants.BASE_TEST_GENERATORS),
                     'default_value': 'combined',
                     'help_message': 'base test generator to use for creating building-block test sequences'
                 },
@@ -383,6 +383,30 @@ __options_spec = {
                     'default_value': False,
                     'help_message': 'do not augment CTD-guided tests with coverage-increasing base tests'
                 },
+                'optimal_augmentation': {
+                    'required': False,
+                    'is_toml_option': True,
+                    'is_cli_option': False,
+                    'type': bool,
+                    'default_value': False,
+                    'help_message': 'when augmenting CTD-guided tests, repeatedly add the base test with the highest coverage gain over the augmented tests, instead of a single pass over base tests sorted by coverage gain'
+                },
+                'augmentation_coverage_cache': {
+                    'required': False,
+                    'is_toml_option': True,
+                    'is_cli_option': False,
+                    'type': bool,
+                    'default_value': False,
+                    'help_message': 'when augmenting CTD-guided tests, reuse coverage of base tests that are unchanged since an earlier augmentation run, from a cache of raw coverage data files'
+                },
+                'augmentation_coverage_cache_dir': {
+                    'required': False,
+                    'is_toml_option': True,
+                    'is_cli_option': False,
+                    'type': str,
+                    'default_value': '',
+                    'help_message': 'directory of the cache of raw coverage data files used with augmentation_coverage_cache (default: ~/.tkltest/exec_cache)'
+                },
                 'no_ctd_coverage': {
                     'required': False,
                     'is_toml_option': True,
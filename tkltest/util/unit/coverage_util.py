@@ -17,21 +17,25 @@ import glob
 import logging
 import subprocess
 import shutil
-import pathlib
 import sys
 
 from tkltest.util import command_util, constants
+from tkltest.util.unit import jacoco_merge
 from tkltest.util.logging_util import tkltest_status
 from tkltest.execute.unit import execute
 
 
 def get_coverage_for_test_suite(build_file, build_type, test_root_dir, report_dir,
                                 raw_cov_data_dir, raw_cov_data_file_pref,
-                                jdk_path, class_files=None, additional_test_suite=None):
+                                jdk_path, class_files=None, additional_test_suite=None, build_jvm_opts='',
+                                build_log_file=None):
     """Runs test cases and returns coverage information.
 
     Runs test cases using the given Ant build file, reads coverage information from the Jacoco CSV
     coverage file, and returns dictionary containing instruction, line, and branch coverage data.
+    If build_jvm_opts is specified, the options are added to the JVM options of the ant or maven
+    process that runs the test cases (gradle runs builds in a long-lived daemon). If build_log_file is
+    specified, the output of the build that runs the test cases is written to that file.
 
     Args:
         build_file (str): Build file to use for running tests
@@ -41,11 +45,13 @@ def get_coverage_for_test_suite(build_file, build_type, test_root_dir, report_di
         jdk_path (str): path to the jdk home to be used for executing the tests and measuring their coverage
         class_files (str): the class file of the app
         additional_test_suite (dict): information of additional test suite, to add its coverage to the tests coverage
+        build_jvm_opts (str): JVM options for the ant or maven process that runs the test cases
+        build_log_file (str): file to write the output of the build that runs the test cases to
     Returns:
         dict: Information about instructions, lines, and branches covered and missed
     """
 
-    has_test_suite = list(pathlib.Path(test_root_dir).glob('**/*.java'))
+    has_test_suite = next(__walk_java_files(test_root_dir), None) is not None
     # remove existing coverage file
     main_coverage_dir = os.path.abspath(os.path.join(report_dir,
                                                      constants.TKL_CODE_COVERAGE_REPORT_DIR,
@@ -66,14 +72,21 @@ def get_coverage_for_test_suite(build_file, build_type, test_root_dir, report_di
     env_vars['JAVA_HOME'] = jdk_path
     if has_test_suite:
     # run tests using build file
+        build_env_vars = env_vars
         if build_type == 'ant':
             cmd = "ant -f {} merge-coverage-report".format(build_file)
+            jvm_opts_var = 'ANT_OPTS'
         elif build_type == 'maven':
             cmd = "mvn -f {} clean verify site".format(build_file)
+            jvm_opts_var = 'MAVEN_OPTS'
         else:
             cmd = "gradle --project-dir {} tklest_task".format(test_root_dir)
+            jvm_opts_var = None
+        if build_jvm_opts and jvm_opts_var:
+            build_env_vars = dict(env_vars)
+            build_env_vars[jvm_opts_var] = (env_vars.get(jvm_opts_var, '') + ' ' + build_jvm_opts).strip()
         try:
-            command_util.run_command(cmd, verbose=False, env_vars=env_vars)
+            command_util.run_command(cmd, verbose=False, env_vars=build_env_vars, log_path=build_log_file)
         except subprocess.CalledProcessError as e:
             tkltest_status('Error while running test suite for coverage computing: {}\n{}'.format(e, e.stderr), error=True)
             return None
@@ -82,6 +95,9 @@ def get_coverage_for_test_suite(build_file, build_type, test_root_dir, report_di
             tkltest_status('{} was not created by : {}'.format(jacoco_raw_data_file, cmd), error=True)
             return None
 
+    # the build of the additional test suite is run after the build of the test suite, not concurrently with it:
+    # both builds may compile and write to the same app output directories (e.g., a "clean test" build of the
+    # dev-written tests of the app)
     if additional_test_suite:
         '''
         when we have additional_test_suite, we allow it to fail.
@@ -112,13 +128,14 @@ def get_coverage_for_test_suite(build_file, build_type, test_root_dir, report_di
             if has_test_suite:
                 merged_exec_file = jacoco_raw_data_file + '_merged_with_' + os.path.basename(additional_exec_file)
                 merged_csv_file = coverage_csv_file + '_merged_with_' + os.path.basename(additional_exec_file) + '.csv'
-                try:
-                    command_util.run_command("java -jar {} merge {} {} --destfile {}".
-                                             format(jacoco_cli_file, jacoco_raw_data_file, additional_exec_file,
-                                                    merged_exec_file), verbose=True, env_vars=env_vars)
-                except subprocess.CalledProcessError as e:
-                    tkltest_status('Warning: Failed to merge coverage data files {} and {}:\n {}\n{}'.format(jacoco_raw_data_file, additional_exec_file, e, e.stderr))
+                merged_store, skipped = jacoco_merge.merge_exec_files([jacoco_raw_data_file, additional_exec_file])
+                if skipped:
+                    tkltest_status('Warning: Failed to merge coverage data files {} and {}:\n {}'.format(
+                        jacoco_raw_data_file, additional_exec_file,
+                        '\n '.join('{}: {}'.format(exec_file, e) for exec_file, e in skipped)))
                     no_failure = False
+                else:
+                    jacoco_merge.write_exec_file(merged_exec_file, merged_store)
             else:
                 merged_exec_file = additional_exec_file
                 merged_csv_file = os.path.join(main_coverage_dir, os.path.basename(additional_exec_file) + '.csv')
@@ -127,8 +144,9 @@ def get_coverage_for_test_suite(build_file, build_type, test_root_dir, report_di
                 jacoco_classfiles_ops = ''
                 for classpath in class_files:
                     jacoco_classfiles_ops += '--classfiles {} '.format(classpath)
-                command_util.run_command("java -jar {} report {} {} --csv {}".
-                                         format(jacoco_cli_file, merged_exec_file, jacoco_classfiles_ops,
+                command_util.run_command("java {} -jar {} report {} {} --csv {}".
+                                         format(constants.JACOCO_CLI_JVM_OPTS, jacoco_cli_file,
+                                                merged_exec_file, jacoco_classfiles_ops,
                                                 merged_csv_file), verbose=True, env_vars=env_vars)
             except subprocess.CalledProcessError as e:
                 tkltest_status('Warning: Failed to create CSV coverage report {} from {}:\n {}\n{}'.format(merged_csv_file, merged_exec_file, e, e.stderr))
@@ -153,7 +171,7 @@ def get_coverage_for_test_suite(build_file, build_type, test_root_dir, report_di
 
     jacoco_new_file_name = os.path.join(raw_cov_data_dir,
                                             raw_cov_data_file_pref + constants.JACOCO_SUFFIX_FOR_AUGMENTATION)
-    shutil.move(jacoco_raw_date_file, jacoco_new_file_name)
+    shutil.move(jacoco_raw_data_file, jacoco_new_file_name)
 
     # read the coverage CSV file and compute total instruction, line, and branch coverage
     total_inst_covered = 0;
@@ -191,76 +209,86 @@ def get_coverage_for_test_suite(build_file, build_type, test_root_dir, report_di
 
 
 
-def get_delta_coverage(test, test_raw_cov_file, ctd_raw_cov_file, main_coverage_dir, base_coverage, class_files,
-                       remove_merged_cov_file, max_memory, jdk_path):
+def get_raw_coverage_for_test_suite(build_file, build_type, test_root_dir, report_dir, raw_cov_data_dir,
+                                    raw_cov_data_file_pref, jdk_path, build_jvm_opts='', build_log_file=None):
+    """Runs test cases and returns the raw coverage data file created for them.
 
-    """Merges two raw coverage data files and returns delta coverage information between respective test suites
+    Like get_coverage_for_test_suite(), but for ant builds, runs the build only up to the merging of the raw
+    coverage data, skipping the Jacoco reports (which analyze all app classes); maven and gradle builds create
+    the reports as part of running the tests. The raw coverage data file is moved to raw_cov_data_dir.
 
-        Runs jacoco cli merge and report commands between two given raw jacoco.exec data files,
-        reads coverage information from the Jacoco CSV coverage file, and returns dictionary
-        containing instruction, line, and branch delta coverage data.
+    Args:
+        build_file (str): Build file to use for running tests
+        build_type (str): Type of build file (either ant, maven or gradle)
+        test_root_dir (str): Root directory of test suite
+        report_dir (str): Main reports directory, under which coverage report is generated
+        raw_cov_data_dir (str): Directory to move the raw coverage data file to
+        raw_cov_data_file_pref (str): Prefix of the name of the raw coverage data file
+        jdk_path (str): path to the jdk home to be used for executing the tests and measuring their coverage
+        build_jvm_opts (str): JVM options for the ant or maven process that runs the test cases
+        build_log_file (str): file to write the output of the build that runs the test cases to
+    Returns:
+        str: the raw coverage data file, or None if running the tests failed
+    """
+    jacoco_new_file_name = os.path.join(raw_cov_data_dir,
+                                        raw_cov_data_file_pref + constants.JACOCO_SUFFIX_FOR_AUGMENTATION)
+    if build_type != 'ant':
+        if not get_coverage_for_test_suite(build_file=build_file, build_type=build_type, test_root_dir=test_root_dir,
+                                           report_dir=report_dir, raw_cov_data_dir=raw_cov_data_dir,
+                                           raw_cov_data_file_pref=raw_cov_data_file_pref, jdk_path=jdk_path,
+                                           build_jvm_opts=build_jvm_opts, build_log_file=build_log_file):
+            return None
+        return jacoco_new_file_name
 
-        Args:
-            test (str): the name of the test class whose delta coverage is being computed
-            test_raw_cov_file (str): the jacoco.exec coverage data file of the test
-            ctd_raw_cov_file (str): he jacoco.exec coverage data file of the ctd test suite we are comparing against
-            main_coverage_dir (str): Main directory in which coverage report is generated
-            base_coverage (dict): base coverage to compute coverage gain (delta) against
-            remove_merged_cov_file (bool): whether to remove existing merged coverage file
-            max_memory (int): maximal memory to use for merging coverage reports
-            jdk_path (str): path to the jdk home to be used for executing the tests and measuring their coverage
+    env_vars = dict(os.environ.copy())
+    env_vars['JAVA_HOME'] = jdk_path
+    if build_jvm_opts:
+        env_vars['ANT_OPTS'] = (env_vars.get('ANT_OPTS', '') + ' ' + build_jvm_opts).strip()
+    cmd = "ant -f {} merge-coverage".format(build_file)
+    try:
+        command_util.run_command(cmd, verbose=False, env_vars=env_vars, log_path=build_log_file)
+    except subprocess.CalledProcessError as e:
+        tkltest_status('Error while running test suite for coverage computing: {}\n{}'.format(e, e.stderr), error=True)
+        return None
+    jacoco_raw_data_file = get_jacoco_exec_file(build_type, test_root_dir)
+    if not os.path.exists(jacoco_raw_data_file):
+        tkltest_status('{} was not created by : {}'.format(jacoco_raw_data_file, cmd), error=True)
+        return None
+    shutil.move(jacoco_raw_data_file, jacoco_new_file_name)
+    return jacoco_new_file_name
 
-        Returns:
-            dict: delta instruction, line, branch coverage
-            dict:
-        """
 
-    # run jacoco cli merge command
+def get_coverage_from_exec_file(exec_file, main_coverage_dir, report_name, class_files, jdk_path, max_memory=None):
+    """Creates coverage reports for a raw coverage data file and returns coverage information.
 
-    output_exec_file = os.path.join(os.path.dirname(ctd_raw_cov_file), constants.JACOCO_MERGED_DATA_FOR_AUGMENTATION);
+    Runs jacoco cli report command on the given raw jacoco.exec data file, reads coverage information
+    from the generated Jacoco CSV coverage file, and returns dictionary containing instruction, line,
+    branch, and method coverage data.
 
-    if remove_merged_cov_file:
-        try:
-            os.remove(output_exec_file)
-        except OSError:
-            pass
+    Args:
+        exec_file (str): the jacoco.exec coverage data file to create reports for
+        main_coverage_dir (str): Main directory in which coverage report is generated
+        report_name (str): base name of the CSV coverage file
+        class_files (list): App classes paths
+        jdk_path (str): path to the jdk home to be used for creating the reports
+        max_memory (int): maximal memory to use for creating the reports
+
+    Returns:
+        dict: Information about instructions, lines, branches, and methods covered and total
+    """
+    coverage_csv_file = os.path.join(main_coverage_dir, report_name) + '.csv'
+    coverage_xml_file = os.path.join(main_coverage_dir, 'jacoco.xml')
 
     jacoco_cli_file = os.path.join(constants.TKLTEST_LIB_DOWNLOAD_DIR, constants.JACOCO_CLI_JAR_NAME)
     env_vars = dict(os.environ.copy())
     env_vars['JAVA_HOME'] = jdk_path
-    if os.path.isfile(ctd_raw_cov_file):
-        try:
-            command_util.run_command("java -Xmx"+str(max_memory)+"m -jar {} merge {} {} --destfile {}".
-                                 format(jacoco_cli_file, test_raw_cov_file, ctd_raw_cov_file,
-                                        output_exec_file), verbose=True, env_vars=env_vars)
-        except subprocess.CalledProcessError as e:
-            # If merging failed we skip current test file and assume it resulted in zero delta coverage
-            # The reason to continue is that we may still gain from previous augmenting test files
-            tkltest_status('Warning: merging of jacoco output failed, skipping current test file: {}\n{}'.format(e, e.stderr))
-            return {
-                       'instruction_cov_delta': 0,
-                       'line_cov_delta': 0,
-                       'branch_cov_delta': 0,
-                       'method_cov_delta': 0
-                   }, {'instruction_covered': base_coverage['instruction_covered'],
-                       'line_covered': base_coverage['line_covered'],
-                       'branch_covered': base_coverage['branch_covered'],
-                       'method_covered': base_coverage['method_covered'],
-                       'instruction_total': base_coverage['instruction_total'],
-                       'line_total': base_coverage['line_total'],
-                       'branch_total': base_coverage['branch_total'],
-                       'method_total': base_coverage['method_total']}
-    else:
-        shutil.copy(test_raw_cov_file, output_exec_file)
-    # run jacoco cli report command
-    coverage_csv_file = os.path.join(main_coverage_dir, os.path.basename(test)) + '.csv'
-    coverage_xml_file = os.path.join(main_coverage_dir, 'jacoco.xml')
-
+    java_cmd = "java -Xmx"+str(max_memory)+"m" if max_memory else "java"
     jacoco_classfiles_ops = ''
     for classpath in class_files:
         jacoco_classfiles_ops += '--classfiles {} '.format(classpath)
-    command_util.run_command("java -jar {} report {} {} --csv {} --html {} --xml {}".
-                             format(jacoco_cli_file, output_exec_file, jacoco_classfiles_ops,
+    command_util.run_command("{} {} -jar {} report {} {} --csv {} --html {} --xml {}".
+                             format(java_cmd, constants.JACOCO_CLI_JVM_OPTS, jacoco_cli_file, exec_file,
+                                    jacoco_classfiles_ops,
                                     coverage_csv_file, main_coverage_dir, coverage_xml_file),
                              verbose=True, env_vars=env_vars)
 
@@ -286,11 +314,6 @@ def get_delta_coverage(test, test_raw_cov_file, ctd_raw_cov_file, main_coverage_
             total_method_missed += int(row['METHOD_MISSED'])
 
     return {
-        'instruction_cov_delta': (total_inst_covered - base_coverage['instruction_covered']),
-        'line_cov_delta': (total_line_covered - base_coverage['line_covered']),
-        'branch_cov_delta': (total_branch_covered - base_coverage['branch_covered']),
-        'method_cov_delta': (total_branch_covered - base_coverage['method_covered']),
-    },{
             'instruction_covered': total_inst_covered,
             'line_covered': total_line_covered,
             'branch_covered': total_branch_covered,
@@ -302,7 +325,6 @@ def get_delta_coverage(test, test_raw_cov_file, ctd_raw_cov_file, main_coverage_
     }
 
 
-
 def add_test_class_to_ctd_suite(test_class, test_directory):
     """Adds a test class to a CTD test suite directory.
 
@@ -318,10 +340,10 @@ def add_test_class_to_ctd_suite(test_class, test_directory):
     test_base, test_ext = os.path.splitext(test_class)
     test_path, _ = os.path.split(test_class)
     test_path_comp = os.path.normpath(test_path).split(os.sep)
+    dst_dir = os.path.join(test_directory, 'monolithic', os.sep.join(test_path_comp[1:]))
+    os.makedirs(dst_dir, exist_ok=True)
     for test_file in glob.glob(test_base+'*.java'):
-        dst_dir = os.path.join(test_directory, 'monolithic', os.sep.join(test_path_comp[1:]))
-        os.makedirs(dst_dir, exist_ok=True)
-        shutil.copy(test_file, dst_dir)
+        __copy_file(test_file, dst_dir)
 
 
 def remove_test_class_from_ctd_suite(test_class, test_directory):
@@ -357,16 +379,77 @@ def get_test_classes(test_root_dir):
         dict: mapping for test directories to file names in a directory
     """
     # need to recursively traverse files because they are located in sub folders; create map from dir path
-    # to .java test files in that dir
-    test_files = {
-        dp : [f for f in filenames if os.path.splitext(f)[1] == '.java']
-        for dp, dn, filenames in os.walk(test_root_dir)
-    }
-    # remove entries with empty file list
-    test_files = {
-        dir : test_files[dir] for dir in test_files.keys() if test_files[dir]
-    }
-    return test_files
+    # to .java test files in that dir (directories without .java files are omitted)
+    return dict(__walk_java_files(test_root_dir))
+
+
+def get_test_class_files(test_root_dir):
+    """Returns all test class files in a test suite, excluding EvoSuite scaffolding classes.
+
+    Args:
+        test_root_dir: Test directory (suite) to return paths for
+
+    Returns:
+        list: paths of test class files
+    """
+    return [
+        os.path.join(dir_path, file_name) for dir_path, file_names in __walk_java_files(test_root_dir)
+        for file_name in file_names if '_scaffolding' not in file_name
+    ]
+
+
+def __walk_java_files(dir_path):
+    """Yields (directory path, names of .java files) for directories with .java files in the given directory tree.
+
+    Directories are yielded in the order of os.walk. Uses os.scandir, whose directory entries carry the file type,
+    instead of os.walk, so that no per-entry stat call is needed to tell files from directories.
+    """
+    files = []
+    sub_dirs = []
+    try:
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    # like os.walk, symbolic links to directories are not traversed
+                    if not entry.is_symlink():
+                        sub_dirs.append(entry.path)
+                elif os.path.splitext(entry.name)[1] == '.java':
+                    files.append(entry.name)
+    except OSError:
+        return
+    if files:
+        yield dir_path, files
+    for sub_dir in sub_dirs:
+        yield from __walk_java_files(sub_dir)
+
+
+def __copy_file(src_file, dst_dir):
+    """Copies a file to a directory, using copy_file_range where available.
+
+    copy_file_range copies in the kernel, and on file systems that support it (e.g. Btrfs, XFS) shares the
+    data blocks of the file instead of copying them; falls back to shutil.copy if it is unavailable or fails,
+    including if it copies fewer bytes than the size of the file (e.g., for files whose size is not known upfront).
+    """
+    if hasattr(os, 'copy_file_range'):
+        dst_file = os.path.join(dst_dir, os.path.basename(src_file))
+        try:
+            with open(src_file, 'rb') as src, open(dst_file, 'wb') as dst:
+                size = os.fstat(src.fileno()).st_size
+                remaining = size
+                while remaining > 0:
+                    copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                    if not copied:
+                        raise OSError('copy_file_range copied {} of {} bytes'.format(size - remaining, size))
+                    remaining -= copied
+                if os.fstat(dst.fileno()).st_size != size:
+                    raise OSError('copy_file_range copied {} of {} bytes'.format(os.fstat(dst.fileno()).st_size,
+                                                                                 size))
+            shutil.copymode(src_file, dst_file)
+            return
+        except OSError:
+            pass
+    shutil.copy(src_file, dst_dir)
+
 
 def get_dev_test_coverage(config, output_dir, create_csv=False, create_xml=False, create_html=False):
 
@@ -405,7 +488,9 @@ def generate_coverage_report(monolith_app_path, jdk_path, exec_file, xml_file=''
 
     """
 
-    jacoco_cli_cmd = 'java -jar {}'.format(os.path.join(constants.TKLTEST_LIB_DOWNLOAD_DIR, constants.JACOCO_CLI_JAR_NAME))
+    jacoco_cli_cmd = 'java {} -jar {}'.format(constants.JACOCO_CLI_JVM_OPTS,
+                                              os.path.join(constants.TKLTEST_LIB_DOWNLOAD_DIR,
+                                                           constants.JACOCO_CLI_JAR_NAME))
     jacoco_classfiles_ops = ''
     for classpath in monolith_app_path:
         jacoco_classfiles_ops += '--classfiles {} '.format(classpath)
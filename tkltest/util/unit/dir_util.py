@@ -13,15 +13,15 @@
 
 import os
 import shutil
-from ..constants import *
+from .. import constants
 
 
 def cd_cli_dir():
-    os.chdir(TKLTEST_CLI_DIR)
+    os.chdir(constants.TKLTEST_CLI_DIR)
 
 
 def get_app_output_dir(app_name):
-    app_dir = os.path.join(TKLTEST_CLI_DIR, TKLTEST_UNIT_OUTPUT_DIR_PREFIX + app_name)
+    app_dir = os.path.join(constants.TKLTEST_CLI_DIR, constants.TKLTEST_UNIT_OUTPUT_DIR_PREFIX + app_name)
     if not os.path.isdir(app_dir):
         os.mkdir(app_dir)
     return app_dir
@@ -39,8 +39,8 @@ def get_output_dir(app_name, module_name):
     # (currently, at the core, the locations of these jars are hard coded)
     if not os.path.isdir(os.path.join(output_dir, "lib")):
         os.makedirs(os.path.join(output_dir, "lib", "download"))
-    shutil.copy(os.path.join(TKLTEST_LIB_DOWNLOAD_DIR, "replacecall-"+RANDOOP_VERSION+".jar"), os.path.join(output_dir, "lib", "download"))
-    shutil.copy(os.path.join(TKLTEST_LIB_DOWNLOAD_DIR, "randoop-all-"+RANDOOP_VERSION+".jar"), os.path.join(output_dir, "lib", "download"))
+    shutil.copy(os.path.join(constants.TKLTEST_LIB_DOWNLOAD_DIR, "replacecall-"+constants.RANDOOP_VERSION+".jar"), os.path.join(output_dir, "lib", "download"))
+    shutil.copy(os.path.join(constants.TKLTEST_LIB_DOWNLOAD_DIR, "randoop-all-"+constants.RANDOOP_VERSION+".jar"), os.path.join(output_dir, "lib", "download"))
     # end of todo
     return output_dir
 
@@ -0,0 +1,179 @@
+# ***************************************************************************
+# Copyright IBM Corporation 2021
+#
+# Licensed under the Eclipse Public License 2.0, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ***************************************************************************
+
+'''
+Content-addressable cache of raw coverage data (.exec) files of test classes.
+
+An entry is keyed by a hash of everything that determines the coverage of a test class: the test
+sources (test class and scaffolding), the build file used for running it, and a signature of the
+environment the test class runs in (the app classes under test and their dependency jars, the JDK, the
+Jacoco and EvoSuite versions, and the JVM options). An entry consists of the raw coverage data file of
+the test class and the coverage computed from it, so that a test class whose key is found in the cache
+need not be executed again. Entries are evicted least recently used first when the total cache size
+exceeds its capacity. The cache directory defaults to constants.TKLTEST_EXEC_CACHE_DIR.
+'''
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+
+from tkltest.util import constants
+
+EXEC_SUFFIX = '.exec'
+COVERAGE_SUFFIX = '.json'
+
+
+__JVM_OPTS_VARS = ['JAVA_TOOL_OPTIONS', 'ANT_OPTS', 'MAVEN_OPTS']
+
+
+def get_signature(class_paths, jdk_path, build_jvm_opts=''):
+    """Returns a signature of the environment that test classes run in.
+
+    The signature covers the given class paths (directories or jars, based on file sizes and mtimes), the JDK
+    (its path and release information), the Jacoco and EvoSuite versions, and the JVM options of the build
+    process (from build_jvm_opts and the environment).
+
+    Args:
+        class_paths (list): app class directories and jars, and dependency jars
+        jdk_path (str): path to the jdk home used for executing the tests
+        build_jvm_opts (str): JVM options added to the build process that runs the tests
+
+    Returns:
+        str: signature
+    """
+    digest = hashlib.sha256()
+    for class_path in sorted(set(class_paths or [])):
+        for file_path in __iter_files(class_path):
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            digest.update('{}\0{}\0{}\0'.format(file_path, stat.st_size, stat.st_mtime_ns).encode(
+                'utf-8', errors='surrogateescape'))
+    digest.update(jdk_path.encode('utf-8', errors='surrogateescape') + b'\0')
+    try:
+        with open(os.path.join(jdk_path, 'release'), 'rb') as f:
+            digest.update(f.read())
+    except OSError:
+        pass
+    digest.update('\0{}\0{}\0{}\0'.format(constants.JACOCO_MAVEN_VERSION, constants.EVOSUITE_VERSION,
+                                           build_jvm_opts).encode('utf-8', errors='surrogateescape'))
+    for jvm_opts_var in __JVM_OPTS_VARS:
+        digest.update('{}\0'.format(os.environ.get(jvm_opts_var, '')).encode('utf-8', errors='surrogateescape'))
+    return digest.hexdigest()
+
+
+def get_key(source_files, build_file, signature):
+    """Returns the cache key for a test class.
+
+    Args:
+        source_files (list): paths to the test sources of the test class (test class and scaffolding)
+        build_file (str): build file used for running the test class
+        signature (str): signature of the environment of the test class (see get_signature)
+
+    Returns:
+        str: cache key
+    """
+    digest = hashlib.sha256()
+    for file_path in sorted(source_files) + [build_file]:
+        digest.update(file_path.encode('utf-8', errors='surrogateescape') + b'\0')
+        with open(file_path, 'rb') as f:
+            digest.update(f.read())
+        digest.update(b'\0')
+    digest.update(signature.encode('ascii'))
+    return digest.hexdigest()
+
+
+def lookup(key, exec_file, cache_dir=None):
+    """Looks up the given key in the cache.
+
+    If found, copies the cached raw coverage data file to exec_file and marks the entry as recently used.
+
+    Args:
+        key (str): cache key
+        exec_file (str): path to copy the cached raw coverage data file to
+        cache_dir (str): cache directory (constants.TKLTEST_EXEC_CACHE_DIR if not specified)
+
+    Returns:
+        dict: cached coverage information, or None if the key is not in the cache
+    """
+    entry = os.path.join(cache_dir or constants.TKLTEST_EXEC_CACHE_DIR, key)
+    try:
+        with open(entry + COVERAGE_SUFFIX) as f:
+            coverage = json.load(f)
+        shutil.copyfile(entry + EXEC_SUFFIX, exec_file)
+        os.utime(entry + EXEC_SUFFIX)
+    except (OSError, ValueError):
+        return None
+    return coverage
+
+
+def store(key, exec_file, coverage, cache_dir=None):
+    """Adds the given raw coverage data file and coverage information to the cache under the given key"""
+    cache_dir = cache_dir or constants.TKLTEST_EXEC_CACHE_DIR
+    entry = os.path.join(cache_dir, key)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        shutil.copyfile(exec_file, entry + EXEC_SUFFIX)
+        with open(entry + COVERAGE_SUFFIX, 'w') as f:
+            json.dump(coverage, f)
+    except OSError as e:
+        logging.info('Failed to add {} to raw coverage data cache: {}'.format(exec_file, e))
+
+
+def evict(max_size=None, cache_dir=None):
+    """Evicts least recently used entries from the cache until its total size is at most max_size bytes
+    (constants.TKLTEST_EXEC_CACHE_MAX_SIZE if not specified); the size of an entry is the size of both its files"""
+    if max_size is None:
+        max_size = constants.TKLTEST_EXEC_CACHE_MAX_SIZE
+    cache_dir = cache_dir or constants.TKLTEST_EXEC_CACHE_DIR
+    # map from entry to [last use, size]; the last use of an entry is the mtime of its raw coverage data file
+    entries = {}
+    total_size = 0
+    try:
+        with os.scandir(cache_dir) as it:
+            for dir_entry in it:
+                for suffix in (EXEC_SUFFIX, COVERAGE_SUFFIX):
+                    if dir_entry.name.endswith(suffix):
+                        stat = dir_entry.stat()
+                        entry = entries.setdefault(dir_entry.path[:-len(suffix)], [0, 0])
+                        if suffix == EXEC_SUFFIX:
+                            entry[0] = stat.st_mtime
+                        entry[1] += stat.st_size
+                        total_size += stat.st_size
+    except FileNotFoundError:
+        return
+    for entry, (_, size) in sorted(entries.items(), key=lambda item: item[1][0]):
+        if total_size <= max_size:
+            break
+        for suffix in (EXEC_SUFFIX, COVERAGE_SUFFIX):
+            try:
+                os.remove(entry + suffix)
+            except OSError:
+                pass
+        total_size -= size
+
+
+def __iter_files(path):
+    if not os.path.isdir(path):
+        yield path
+        return
+    with os.scandir(path) as it:
+        entries = sorted((entry.path, entry.is_dir()) for entry in it)
+    for entry_path, is_dir in entries:
+        if is_dir:
+            yield from __iter_files(entry_path)
+        else:
+            yield entry_path
@@ -0,0 +1,334 @@
+# ***************************************************************************
+# Copyright IBM Corporation 2021
+#
+# Licensed under the Eclipse Public License 2.0, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ***************************************************************************
+
+'''
+In-process reading, merging, and writing of Jacoco raw coverage data (.exec) files.
+
+The .exec format is a sequence of blocks written by Jacoco's ExecutionDataWriter:
+header blocks (magic number and format version), session info blocks, and execution
+data blocks, each holding the class id, the class name, and the boolean probe array of
+a class. Probe arrays are stored packed, eight probes per byte, lowest bit first, which
+maps directly to a python int in little-endian byte order (bit i is probe i).
+
+An execution data store is represented as a dict mapping class id to a tuple
+(class name, probe count, probes), and is merged the same way Jacoco's
+ExecutionDataStore does: probes of a class are or-ed if the class is already in the
+store, otherwise the class is added to the store.
+
+For comparing many stores over the same set of classes, stores can be flattened into
+probe vectors: a single int holding the probes of all classes at fixed offsets given
+by a probe index, so that merging and coverage deltas become bitwise operations over
+the entire vector.
+'''
+
+import os
+import struct
+import zipfile
+
+BLOCK_HEADER = 0x01
+BLOCK_SESSIONINFO = 0x10
+BLOCK_EXECUTIONDATA = 0x11
+MAGIC_NUMBER = 0xC0C0
+FORMAT_VERSION = 0x1007
+
+try:
+    # python 3.10+: population count over the machine words of the int, without creating a string
+    __popcount = int.bit_count
+except AttributeError:
+    def __popcount(vector):
+        return bin(vector).count('1')
+
+
+def load_exec_file(exec_file, store=None):
+    """Loads the execution data of a Jacoco .exec file.
+
+    Reads all execution data blocks of the given file and merges them into the given store (or into
+    a new store if none is given).
+
+    Args:
+        exec_file (str): path to the Jacoco .exec file
+        store (dict): execution data store to merge the loaded data into
+
+    Returns:
+        dict: execution data store, mapping class id to (class name, probe count, probes)
+
+    Raises:
+        OSError: if the file cannot be read
+        ValueError: if the file is not a valid Jacoco .exec file
+    """
+    if store is None:
+        store = {}
+    with open(exec_file, 'rb') as f:
+        data = f.read()
+    try:
+        __read_blocks(data, store)
+    except (struct.error, IndexError):
+        raise ValueError('Truncated Jacoco execution data file: {}'.format(exec_file))
+    return store
+
+
+def merge_exec_files(exec_files, store=None):
+    """Incrementally merges the execution data of the given Jacoco .exec files.
+
+    Loads and merges the files one at a time; a file that cannot be read, is not a valid Jacoco .exec
+    file, or holds execution data incompatible with the data merged so far is skipped and does not
+    affect the data merged from the other files.
+
+    Args:
+        exec_files (list): paths to the Jacoco .exec files to merge
+        store (dict): execution data store to merge the loaded data into
+
+    Returns:
+        dict: merged execution data store
+        list: (exec file, error) for every skipped file
+    """
+    if store is None:
+        store = {}
+    skipped = []
+    for exec_file in exec_files:
+        try:
+            file_store = load_exec_file(exec_file)
+            # check compatibility of the entire file before merging, so that a bad file leaves store untouched
+            for class_id, (name, probe_count, _) in file_store.items():
+                existing = store.get(class_id)
+                if existing is not None and (existing[0] != name or existing[1] != probe_count):
+                    raise ValueError('Incompatible execution data for class {} with id {:016x}'.format(name, class_id))
+        except (OSError, ValueError) as e:
+            skipped.append((exec_file, e))
+            continue
+        merge_exec_data(store, file_store)
+    return store, skipped
+
+
+def merge_exec_data(store, other_store):
+    """Merges the execution data of other_store into store (in place) and returns store"""
+    for class_id, (name, probe_count, probes) in other_store.items():
+        __merge_class(store, class_id, name, probe_count, probes)
+    return store
+
+
+def get_class_names(class_paths):
+    """Returns the names of the classes in the given class paths, as they occur in Jacoco execution data.
+
+    Args:
+        class_paths (list): class directories or jars
+
+    Returns:
+        frozenset: VM names of the classes (e.g., "org/example/Foo$Bar")
+    """
+    class_names = set()
+    for class_path in class_paths or []:
+        if os.path.isdir(class_path):
+            for dir_path, _, file_names in os.walk(class_path):
+                rel_dir = os.path.relpath(dir_path, class_path)
+                for file_name in file_names:
+                    if file_name.endswith('.class'):
+                        class_file = file_name if rel_dir == os.curdir else os.path.join(rel_dir, file_name)
+                        class_names.add(class_file[:-len('.class')].replace(os.sep, '/'))
+        elif zipfile.is_zipfile(class_path):
+            with zipfile.ZipFile(class_path) as jar:
+                class_names.update(name[:-len('.class')] for name in jar.namelist() if name.endswith('.class'))
+    return frozenset(class_names)
+
+
+def filter_exec_data(store, class_names):
+    """Returns the execution data of the classes in class_names from the given store"""
+    return {class_id: entry for class_id, entry in store.items() if entry[0] in class_names}
+
+
+def get_covered_probe_count(store):
+    """Returns the number of covered probes in the given store"""
+    return sum(popcount(probes) for _, _, probes in store.values())
+
+
+def create_probe_index(stores):
+    """Creates a probe index for flattening execution data stores into probe vectors.
+
+    Assigns to every class occurring in the given stores a fixed, byte-aligned offset in the probe vector.
+
+    Args:
+        stores (list): execution data stores to create the index for
+
+    Returns:
+        dict: probe index, mapping class id to (class name, probe count, byte offset)
+    """
+    probe_index = {}
+    offset = 0
+    for store in stores:
+        for class_id, (name, probe_count, _) in store.items():
+            if class_id not in probe_index:
+                probe_index[class_id] = (name, probe_count, offset)
+                offset += (probe_count + 7) // 8
+    return probe_index
+
+
+def to_probe_vector(store, probe_index):
+    """Flattens the given execution data store into a probe vector.
+
+    Args:
+        store (dict): execution data store to flatten
+        probe_index (dict): probe index containing all classes of the store
+
+    Returns:
+        int: probe vector
+
+    Raises:
+        ValueError: if the probes of a class do not match the class in the probe index
+    """
+    vector = bytearray(__get_vector_size(probe_index))
+    for class_id, (name, probe_count, probes) in store.items():
+        indexed_name, indexed_probe_count, offset = probe_index[class_id]
+        if indexed_name != name or indexed_probe_count != probe_count:
+            raise ValueError('Incompatible execution data for class {} with id {:016x}'.format(name, class_id))
+        probe_bytes = (probe_count + 7) // 8
+        vector[offset:offset + probe_bytes] = probes.to_bytes(probe_bytes, 'little')
+    return int.from_bytes(vector, 'little')
+
+
+def from_probe_vector(vector, probe_index):
+    """Returns the execution data store represented by the given probe vector"""
+    data = vector.to_bytes(__get_vector_size(probe_index), 'little')
+    store = {}
+    for class_id, (name, probe_count, offset) in probe_index.items():
+        probes = int.from_bytes(data[offset:offset + (probe_count + 7) // 8], 'little')
+        if probes:
+            store[class_id] = (name, probe_count, probes)
+    return store
+
+
+def complement_probe_vector(vector, probe_index):
+    """Returns the probe vector of the probes in the probe index that are not set in the given probe vector.
+
+    Unlike ~vector, the complement is a non-negative int, so that and-ing a probe vector with it does not
+    require converting a negative int to two's complement (and allocating a temporary) on each operation.
+    Padding bits between classes in the probe vector are never set in the complement, so that the complement
+    is zero if all probes are set in the given probe vector.
+    """
+    probe_mask = 0
+    for _, probe_count, offset in probe_index.values():
+        probe_mask |= ((1 << probe_count) - 1) << (8 * offset)
+    return probe_mask ^ vector
+
+
+def popcount(vector):
+    """Returns the number of covered probes in the given probes or probe vector"""
+    return __popcount(vector)
+
+
+def write_exec_file(exec_file, store, session_id='tkltest'):
+    """Writes the given execution data store to a Jacoco .exec file.
+
+    Writes a header block, a single session info block, and an execution data block for every class
+    in the store that has at least one covered probe (as Jacoco does).
+
+    Args:
+        exec_file (str): path to the Jacoco .exec file to write
+        store (dict): execution data store to write
+        session_id (str): id of the session info block
+    """
+    out = bytearray()
+    out.append(BLOCK_HEADER)
+    out += struct.pack('>HH', MAGIC_NUMBER, FORMAT_VERSION)
+    out.append(BLOCK_SESSIONINFO)
+    __write_utf(out, session_id)
+    out += struct.pack('>qq', 0, 0)
+    for class_id, (name, probe_count, probes) in store.items():
+        if not probes:
+            continue
+        out.append(BLOCK_EXECUTIONDATA)
+        out += struct.pack('>Q', class_id)
+        __write_utf(out, name)
+        __write_varint(out, probe_count)
+        out += probes.to_bytes((probe_count + 7) // 8, 'little')
+    with open(exec_file, 'wb') as f:
+        f.write(out)
+
+
+def __read_blocks(data, store):
+    pos = 0
+    end = len(data)
+    while pos < end:
+        block_type = data[pos]
+        pos += 1
+        if block_type == BLOCK_HEADER:
+            magic, version = struct.unpack_from('>HH', data, pos)
+            pos += 4
+            if magic != MAGIC_NUMBER:
+                raise ValueError('Invalid Jacoco execution data file')
+            if version != FORMAT_VERSION:
+                raise ValueError('Incompatible Jacoco execution data version: {:#x}'.format(version))
+        elif block_type == BLOCK_SESSIONINFO:
+            _, pos = __read_utf(data, pos)
+            pos += 16
+        elif block_type == BLOCK_EXECUTIONDATA:
+            class_id, = struct.unpack_from('>Q', data, pos)
+            name, pos = __read_utf(data, pos + 8)
+            probe_count, pos = __read_varint(data, pos)
+            probe_bytes = (probe_count + 7) // 8
+            if pos + probe_bytes > end:
+                raise IndexError()
+            probes = int.from_bytes(data[pos:pos + probe_bytes], 'little')
+            pos += probe_bytes
+            __merge_class(store, class_id, name, probe_count, probes)
+        else:
+            raise ValueError('Unknown block type in Jacoco execution data file: {:#x}'.format(block_type))
+
+
+def __merge_class(store, class_id, name, probe_count, probes):
+    existing = store.get(class_id)
+    if existing is None:
+        store[class_id] = (name, probe_count, probes)
+        return
+    if existing[0] != name or existing[1] != probe_count:
+        raise ValueError('Incompatible execution data for class {} with id {:016x}'.format(name, class_id))
+    merged_probes = existing[2] | probes
+    if merged_probes != existing[2]:
+        # replace the entry only if the merge covers new probes of the class
+        store[class_id] = (name, probe_count, merged_probes)
+
+
+def __read_utf(data, pos):
+    length, = struct.unpack_from('>H', data, pos)
+    pos += 2
+    if pos + length > len(data):
+        raise IndexError()
+    return data[pos:pos + length].decode('utf-8', errors='surrogateescape'), pos + length
+
+
+def __write_utf(out, value):
+    encoded = value.encode('utf-8', errors='surrogateescape')
+    out += struct.pack('>H', len(encoded))
+    out += encoded
+
+
+def __read_varint(data, pos):
+    value = 0
+    shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        value |= (b & 0x7F) << shift
+        if not b & 0x80:
+            return value, pos
+        shift += 7
+
+
+def __write_varint(out, value):
+    while value & ~0x7F:
+        out.append(0x80 | (value & 0x7F))
+        value >>= 7
+    out.append(value)
+
+
+def __get_vector_size(probe_index):
+    return max((offset + (probe_count + 7) // 8 for _, probe_count, offset in probe_index.values()), default=0)